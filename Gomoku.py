@@ -1,14 +1,37 @@
+import json
 import math
+import multiprocessing
+import os
+import queue
 import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from functools import lru_cache
+from itertools import compress
 import tkinter as tk
 from tkinter import ttk
-import pygame  
+try:
+    import pygame
+except ImportError:  # sound is optional
+    pygame = None
 import numpy as np
 ##################################### Game #####################################
 class Gomoku:
     def __init__(self, size = 15):
         self.size = size
-        self.board = [[0 for _ in range(size)] for _ in range(size)]
+        self.empty_board()
+        self.empty_count = size * size
+        self.winner = 0
+        self.winning_line = None
+        self.evaluator = None
+        self.candidates = None
+        self.zobrist = zobrist_keys(size)
+        self.hash = 0
+
+    def empty_board(self):
+        # The backend's own storage for the stones, all empty.
+        self.board = [[0 for _ in range(self.size)] for _ in range(self.size)]
 
     def print_board(self):
         print("   ", end="")
@@ -33,104 +56,216 @@ class Gomoku:
     def make_move(self, row, col, player):
         if self.is_valid_move(row, col):
             self.board[row][col] = player
+            self.record_move(row, col, player)
             return True
         return False
 
     def undo_move(self, row, col):
-        if 0 <= row < self.size and 0 <= col < self.size:
+        if 0 <= row < self.size and 0 <= col < self.size and self.board[row][col] != 0:
+            player = self.board[row][col]
             self.board[row][col] = 0
+            self.record_undo(row, col, player)
+
+    # Win and draw state is kept up to date from the last move instead of
+    # rescanning the board. Moves are undone in reverse order by the search.
+    def record_move(self, row, col, player):
+        self.empty_count -= 1
+        self.hash ^= self.zobrist[player][row * self.size + col]
+        if self.evaluator:
+            self.evaluator.update(row, col, player)
+        if self.candidates:
+            self.candidates.update(row, col, player)
+        if not self.winner:
+            line = self.five_through(row, col, player)
+            if line:
+                self.winner = player
+                self.winning_line = line
+
+    def record_undo(self, row, col, player):
+        self.empty_count += 1
+        self.hash ^= self.zobrist[player][row * self.size + col]
+        if self.evaluator:
+            self.evaluator.update(row, col, 0)
+        if self.candidates:
+            self.candidates.update(row, col, 0)
+        if self.winner and self.winning_line[0] == (row, col):
+            self.winner = 0
+            self.winning_line = None
+
+    def five_through(self, row, col, player):
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            after = self.count_from(row + dr, col + dc, dr, dc, player)
+            before = self.count_from(row - dr, col - dc, -dr, -dc, player)
+            if before + after >= 4:
+                # The placed stone goes first so undo_move can spot it.
+                return [(row, col)] + [(row + i * dr, col + i * dc) for i in range(-before, after + 1) if i]
+        return None
+
+    def count_from(self, row, col, dr, dc, player):
+        count = 0
+        while 0 <= row < self.size and 0 <= col < self.size and self.board[row][col] == player:
+            count += 1
+            row += dr
+            col += dc
+        return count
 
     def get_legal_moves(self):
         return [(r, c) for r in range(self.size) for c in range(self.size) if self.board[r][c] == 0]
 
+    def get_candidate_moves(self):
+        # Moves near existing stones when a CandidateMoves is attached and the
+        # board is not empty, every legal move otherwise.
+        moves = self.candidates.get_moves() if self.candidates else None
+        return moves or self.get_legal_moves()
+
+    def candidate_moves(self, radius):
+        # The candidate tracker that suits this backend.
+        return CandidateMoves(self, radius)
+
     def check_win(self, player):
-        def count_consecutive(r_step, c_step, row, col):
-            count = 0
-            while (0 <= row < self.size and 0 <= col < self.size and self.board[row][col] == player):
-                count += 1
-                row += r_step
-                col += c_step
-            return count
+        return self.winner == player
+
+    def is_draw(self):
+        return self.empty_count == 0
 
+    def evaluate(self, player):
+        if self.evaluator:
+            return self.evaluator.score(player)
+        return evaluate_board(self.board, player)
+#################################### Zobrist ###################################
+@lru_cache(maxsize=None)
+def zobrist_keys(size):
+    # One random 64-bit key per cell and player, indexed [player][row * size + col].
+    # Seeded so hashes are the same from run to run.
+    rng = random.Random(size)
+    return ([0] * (size * size),) + tuple(
+        [rng.getrandbits(64) for _ in range(size * size)] for _ in (1, 2)
+    )
+
+# Mixed into the hash while searching after a null move, where the side to
+# move no longer follows from the stone count.
+NULL_MOVE_KEY = random.Random(0).getrandbits(64)
+################################### Bitboard ###################################
+BIT_FLAGS = bytes.maketrans(b"01", b"\x00\x01")
+
+@lru_cache(maxsize=None)
+def bit_cells(size):
+    # (row, col) of every bit of a BitboardGomoku mask, guard column included.
+    return [divmod(bit, size + 1) for bit in range(size * (size + 1))]
+
+class BitboardGomoku(Gomoku):
+    # One big int per player. Cell (row, col) is bit row * (size + 1) + col; the
+    # extra guard column stays empty so shifted lines never wrap across rows.
+    # Fives and candidate moves come from shifts of the masks; see
+    # benchmarks/backend_speed.py for how it compares with Gomoku.
+    def empty_board(self):
+        self.width = self.size + 1
+        self.stones = [0, 0, 0]
+        self.full = 0
         for row in range(self.size):
-            for col in range(self.size):
-                if self.board[row][col] != player:
-                    continue
-                if (
-                    count_consecutive(0, 1, row, col) >= 5 or
-                    count_consecutive(1, 0, row, col) >= 5 or
-                    count_consecutive(1, 1, row, col) >= 5 or
-                    count_consecutive(1, -1, row, col) >= 5
-                ):
-                    return True
+            self.full |= ((1 << self.size) - 1) << (row * self.width)
+        self.shifts = (1, self.width, self.width + 1, self.width - 1)
+        self._board = None
+
+    @property
+    def board(self):
+        # Read-only list of lists view, rebuilt only after the position changed.
+        if self._board is None:
+            board = [[0] * self.size for _ in range(self.size)]
+            for player in (1, 2):
+                bits = self.stones[player]
+                while bits:
+                    low = bits & -bits
+                    row, col = divmod(low.bit_length() - 1, self.width)
+                    board[row][col] = player
+                    bits ^= low
+            self._board = board
+        return self._board
+
+    def is_valid_move(self, row, col):
+        return (
+            0 <= row < self.size and
+            0 <= col < self.size and
+            not (self.stones[1] | self.stones[2]) & (1 << (row * self.width + col))
+        )
+
+    def make_move(self, row, col, player):
+        if self.is_valid_move(row, col):
+            self.stones[player] |= 1 << (row * self.width + col)
+            self._board = None
+            self.record_move(row, col, player)
+            return True
         return False
 
-    def is_draw(self):
-        return all(cell != 0 for row in self.board for cell in row)
+    def undo_move(self, row, col):
+        if 0 <= row < self.size and 0 <= col < self.size:
+            mask = 1 << (row * self.width + col)
+            player = 1 if self.stones[1] & mask else 2 if self.stones[2] & mask else 0
+            if player:
+                self.stones[player] &= ~mask
+                self._board = None
+                self.record_undo(row, col, player)
+
+    def get_legal_moves(self):
+        return self.mask_cells(self.full & ~(self.stones[1] | self.stones[2]))
+
+    def mask_cells(self, mask):
+        # The mask's binary digits, lowest bit first, as 0/1 flags selecting
+        # cells: one pass in C instead of a loop per set bit.
+        flags = bin(mask)[:1:-1].encode().translate(BIT_FLAGS)
+        return list(compress(bit_cells(self.size), flags))
+
+    def candidate_moves(self, radius):
+        return BitboardCandidates(self, radius)
+
+    def five_through(self, row, col, player):
+        # Nobody had five before this move, so any five found by the shift
+        # test runs through (row, col); only then walk out to collect it.
+        bits = self.stones[player]
+        for shift in self.shifts:
+            pairs = bits & (bits >> shift)
+            if pairs & (pairs >> (2 * shift)) & (bits >> (4 * shift)):
+                return super().five_through(row, col, player)
+        return None
+
+    def count_from(self, row, col, dr, dc, player):
+        # Same walk as Gomoku.count_from, stepping through the bitmask instead.
+        if not (0 <= row < self.size and 0 <= col < self.size):
+            return 0
+        bits = self.stones[player]
+        mask = 1 << (row * self.width + col)
+        shift = dr * self.width + dc
+        count = 0
+        while bits & mask:
+            count += 1
+            mask = mask << shift if shift > 0 else mask >> -shift
+        return count
 ################################### get line ###################################
+@lru_cache(maxsize=None)
+def line_coordinates(size):
+    # Cells of every line get_lines returns, built once per board size.
+    lines = [[(r, c) for c in range(size)] for r in range(size)]
+    lines += [[(r, c) for r in range(size)] for c in range(size)]
+    starts = [(r, 0) for r in range(size)] + [(0, c) for c in range(1, size)]
+    for r, c in starts:
+        diag = [(r + i, c + i) for i in range(size - max(r, c))]
+        if len(diag) >= 5:
+            lines.append(diag)
+    starts = [(r, size - 1) for r in range(size)] + [(0, c) for c in range(size - 2, -1, -1)]
+    for r, c in starts:
+        diag = [(r + i, c - i) for i in range(min(size - r, c + 1))]
+        if len(diag) >= 5:
+            lines.append(diag)
+    return tuple(tuple(line) for line in lines)
+
 def get_lines(board):
-        size = len(board)
-        lines = []
-
-        # Rows
-        for row in board:
-            lines.append(row)
-
-        # Columns
-        for c in range(size):
-            lines.append([board[r][c] for r in range(size)])
-
-        # Diagonals top left => bottom down
-        for r in range(size):
-            diag = []
-            i, j = r, 0
-            while i < size and j < size:
-                diag.append(board[i][j])
-                i += 1
-                j += 1
-            if len(diag) >= 5:
-                lines.append(diag)
-
-        for c in range(1, size):
-            diag = []
-            i, j = 0, c
-            while i < size and j < size:
-                diag.append(board[i][j])
-                i += 1
-                j += 1
-            if len(diag) >= 5:
-                lines.append(diag)
-
-        # Diagonals top right => bottom left
-        for r in range(size):
-            diag = []
-            i, j = r, size - 1
-            while i < size and j >= 0:
-                diag.append(board[i][j])
-                i += 1
-                j -= 1
-            if len(diag) >= 5:
-                lines.append(diag)
-
-        for c in range(size - 2, -1, -1):
-            diag = []
-            i, j = 0, c
-            while i < size and j >= 0:
-                diag.append(board[i][j])
-                i += 1
-                j -= 1
-            if len(diag) >= 5:
-                lines.append(diag)
-
-        return lines
+        return [[board[r][c] for r, c in line] for line in line_coordinates(len(board))]
 #################################### Score #####################################
-def evaluate_line(line, player):
-        s = ''.join(str(cell) for cell in line)
+def line_patterns(player):
         opponent = '2' if player == 1 else '1'
         me = str(player)
-        score = 0
 
-        patterns = {
+        return {
             f"{me*5}": 1000000,
             f"0{me*4}0": 100000,
             f"{opponent}{me*4}0": 10000,
@@ -151,10 +286,54 @@ def evaluate_line(line, player):
             f"0{me}0": 1000,
         }
 
-        for pattern, value in patterns.items():
-            count = s.count(pattern)
-            if count:
-                score += count * value
+@lru_cache(maxsize=None)
+def pattern_table(player):
+        # Counting every pattern with str.count is the same as running the cells
+        # through one automaton that tracks how much of each pattern is matched
+        # and restarts a pattern once it completes (str.count never overlaps).
+        # The automaton is small (~100 states), so it is built once per player
+        # as flat tables indexed by state * 3 + cell: the next state's base
+        # index and the score gained on that step.
+        patterns = [([int(ch) for ch in pattern], value) for pattern, value in line_patterns(player).items()]
+
+        def advance(pattern, matched, cell):
+            seen = pattern[:matched] + [cell]
+            for length in range(min(len(pattern), len(seen)), 0, -1):
+                if seen[-length:] == pattern[:length]:
+                    return length
+            return 0
+
+        states = {(0,) * len(patterns): 0}
+        order = list(states)
+        next_index = []
+        gains = []
+        for state in order:
+            for cell in (0, 1, 2):
+                gain = 0
+                following = []
+                for (pattern, value), matched in zip(patterns, state):
+                    matched = advance(pattern, matched, cell)
+                    if matched == len(pattern):
+                        gain += value
+                        matched = 0
+                    following.append(matched)
+                following = tuple(following)
+                if following not in states:
+                    states[following] = len(order)
+                    order.append(following)
+                next_index.append(states[following] * 3)
+                gains.append(gain)
+        return next_index, gains
+
+def evaluate_line(line, player):
+        next_index, gains = pattern_table(player)
+        index = 0
+        score = 0
+
+        for cell in line:
+            index += cell
+            score += gains[index]
+            index = next_index[index]
 
         return score
 ################################# Score_board ##################################
@@ -167,6 +346,516 @@ def evaluate_board(board, player):
         score -= evaluate_line(line, opponent)
 
     return score
+################################# Batch score ##################################
+@lru_cache(maxsize=None)
+def batch_pattern_table(player):
+    # pattern_table as flat arrays indexed by state * 4 + cell, with a fourth
+    # "padding" cell value that leaves the state alone, so lines of different
+    # lengths can be stepped together.
+    next_index, gains = pattern_table(player)
+    states = len(gains) // 3
+    next_state = np.empty((states, 4), dtype=np.intp)
+    next_state[:, :3] = np.array(next_index).reshape(states, 3) // 3 * 4
+    next_state[:, 3] = np.arange(states) * 4
+    gain = np.zeros((states, 4), dtype=np.int64)
+    gain[:, :3] = np.array(gains).reshape(states, 3)
+    return next_state.ravel(), gain.ravel()
+
+@lru_cache(maxsize=None)
+def batch_line_index(size):
+    # Flat cell index of every line, padded with size * size (a padding cell).
+    lines = line_coordinates(size)
+    index = np.full((len(lines), size), size * size, dtype=np.intp)
+    for i, line in enumerate(lines):
+        index[i, :len(line)] = [r * size + c for r, c in line]
+    return index
+
+def evaluate_boards(boards, player):
+    # evaluate_board for an (N, size, size) stack of boards in one call.
+    boards = np.asarray(boards)
+    count, size = boards.shape[0], boards.shape[1]
+    flat = np.full((count, size * size + 1), 3, dtype=np.int8)
+    flat[:, :-1] = boards.reshape(count, size * size)
+    cells = flat[:, batch_line_index(size)]
+
+    totals = {}
+    for side in (1, 2):
+        next_state, gain = batch_pattern_table(side)
+        index = np.zeros(cells.shape[:2], dtype=np.intp)
+        score = np.zeros(cells.shape[:2], dtype=np.int64)
+        for step in range(size):
+            index += cells[:, :, step]
+            score += gain.take(index)
+            index = next_state.take(index)
+        totals[side] = score.sum(axis=1)
+
+    opponent = 2 if player == 1 else 1
+    return totals[player] - totals[opponent]
+
+class BatchEvaluator:
+    # The game.evaluator interface of IncrementalEvaluator with evaluate_boards
+    # behind it, chosen with evaluator="batch". Being batched, the search
+    # stages the children of nodes just above the leaves and scores them in
+    # one call. Keeps a list board like IncrementalEvaluator's for the threat
+    # scans, and an array to stage.
+    batched = True
+
+    def __init__(self, game):
+        self.board = [row[:] for row in game.board]
+        self.cells = np.array(self.board, dtype=np.int8)
+        self.staged = []
+
+    def update(self, row, col, player):
+        self.board[row][col] = player
+        self.cells[row, col] = player
+
+    def score(self, player):
+        return int(evaluate_boards(self.cells[None], player)[0])
+
+    def stage(self):
+        self.staged.append(self.cells.copy())
+
+    def flush(self, player):
+        staged, self.staged = self.staged, []
+        return evaluate_boards(np.stack(staged), player).tolist() if staged else []
+############################# Incremental evaluator ############################
+# Line scores for both players keyed by the line's base-3 code, shared by all
+# evaluators. A leading 1 digit above the cells keeps lengths apart.
+line_score_cache = {}
+LINE_SCORE_CACHE_MAX = 1 << 18
+LINE_SCORE_CACHE_LIMIT = LINE_SCORE_CACHE_MAX  # entries before the cache starts over
+LINE_SCORE_ENTRY_BYTES = 200  # key, score pair and dict slot: 170-215 measured on CPython 3.11
+
+def limit_line_cache(memory_mb = None):
+    # Caps line_score_cache at about memory_mb (never above the default
+    # LINE_SCORE_CACHE_MAX entries; None restores that), dropping it if it
+    # is over already.
+    global LINE_SCORE_CACHE_LIMIT
+    entries = LINE_SCORE_CACHE_MAX
+    if memory_mb is not None:
+        entries = min(entries, max(1, int(memory_mb * 2 ** 20 / LINE_SCORE_ENTRY_BYTES)))
+    LINE_SCORE_CACHE_LIMIT = entries
+    if len(line_score_cache) > entries:
+        line_score_cache.clear()
+
+class IncrementalEvaluator:
+    # Keeps evaluate_line scores for every line and both players, so that
+    # score() gives evaluate_board's total without rebuilding the lines.
+    # Attach it as game.evaluator; the game reports each move and undo.
+    def __init__(self, game):
+        self.size = game.size
+        self.board = [row[:] for row in game.board]
+        self.lines = line_coordinates(game.size)
+        self.codes = [3 ** len(line) for line in self.lines]
+        self.cell_lines = [[[] for _ in range(game.size)] for _ in range(game.size)]
+        for index, line in enumerate(self.lines):
+            for position, (r, c) in enumerate(line):
+                self.cell_lines[r][c].append((index, 3 ** position))
+                self.codes[index] += self.board[r][c] * 3 ** position
+
+        self.line_scores = [(0, 0)] * len(self.lines)
+        self.totals = [0, 0, 0]
+        for index in range(len(self.lines)):
+            self.rescore(index)
+
+    def rescore(self, index):
+        scores = line_score_cache.get(self.codes[index])
+        if scores is None:
+            cells = [self.board[r][c] for r, c in self.lines[index]]
+            scores = (evaluate_line(cells, 1), evaluate_line(cells, 2))
+            if len(line_score_cache) >= LINE_SCORE_CACHE_LIMIT:
+                line_score_cache.clear()
+            line_score_cache[self.codes[index]] = scores
+        old = self.line_scores[index]
+        self.totals[1] += scores[0] - old[0]
+        self.totals[2] += scores[1] - old[1]
+        self.line_scores[index] = scores
+
+    def update(self, row, col, player):
+        change = player - self.board[row][col]
+        self.board[row][col] = player
+        for index, weight in self.cell_lines[row][col]:
+            self.codes[index] += change * weight
+            self.rescore(index)
+
+    def score(self, player):
+        opponent = 2 if player == 1 else 1
+        return self.totals[player] - self.totals[opponent]
+############################### Candidate moves ################################
+@lru_cache(maxsize=None)
+def neighbourhoods(size, radius):
+    # For each flat cell index, the other cells at most radius rows and columns away.
+    result = []
+    for row in range(size):
+        for col in range(size):
+            result.append(tuple(
+                r * size + c
+                for r in range(max(row - radius, 0), min(row + radius + 1, size))
+                for c in range(max(col - radius, 0), min(col + radius + 1, size))
+                if (r, c) != (row, col)
+            ))
+    return tuple(result)
+
+class CandidateMoves:
+    # Empty cells within radius of some stone. Attach it as game.candidates;
+    # the game reports each move and undo, so the set is never rebuilt by
+    # scanning the board.
+    def __init__(self, game, radius = 2):
+        self.size = game.size
+        self.radius = radius
+        self.cells = [(r, c) for r in range(game.size) for c in range(game.size)]
+        self.neighbours = neighbourhoods(game.size, radius)
+        self.near = [0] * (game.size * game.size)
+        self.occupied = [False] * (game.size * game.size)
+        self.moves = set()
+        for row in range(game.size):
+            for col in range(game.size):
+                if game.board[row][col]:
+                    self.update(row, col, game.board[row][col])
+
+    def update(self, row, col, player):
+        index = row * self.size + col
+        if player:
+            self.occupied[index] = True
+            self.moves.discard(index)
+            for cell in self.neighbours[index]:
+                self.near[cell] += 1
+                if self.near[cell] == 1 and not self.occupied[cell]:
+                    self.moves.add(cell)
+        else:
+            self.occupied[index] = False
+            for cell in self.neighbours[index]:
+                self.near[cell] -= 1
+                if self.near[cell] == 0:
+                    self.moves.discard(cell)
+            if self.near[index]:
+                self.moves.add(index)
+
+    def get_moves(self):
+        return [self.cells[index] for index in sorted(self.moves)]
+
+class BitboardCandidates:
+    # CandidateMoves for a BitboardGomoku, worked out from the stone masks
+    # when asked instead of kept on every move and undo: the search asks once
+    # per interior node but moves at every node. Same cells, same order.
+    def __init__(self, game, radius = 2):
+        self.game = game
+        self.radius = radius
+
+    def update(self, row, col, player):
+        pass
+
+    def mask(self):
+        # The stones grown radius cells along rows, then along columns;
+        # masking with full after each step drops what spilled into the
+        # guard column, so nothing wraps onto the next row.
+        game = self.game
+        stones = game.stones[1] | game.stones[2]
+        near = stones
+        for _ in range(self.radius):
+            near |= (near << 1 | near >> 1) & game.full
+        for _ in range(self.radius):
+            near |= (near << game.width | near >> game.width) & game.full
+        return near & ~stones
+
+    @property
+    def moves(self):
+        # Flat indices, as CandidateMoves keeps them.
+        size = self.game.size
+        return {row * size + col for row, col in self.get_moves()}
+
+    def get_moves(self):
+        return self.game.mask_cells(self.mask())
+#################################### Threats ###################################
+WIN, OPEN_FOUR, FOUR, OPEN_THREE = 4, 3, 2, 1
+
+def threat_levels(game, row, col):
+    # Strongest shape that playing (row, col) would give each player along
+    # one line, as [_, player 1, player 2]: WIN, OPEN_FOUR, FOUR (one end
+    # open), OPEN_THREE or 0. Walks the evaluator's list board when there is
+    # one, which is cheaper to index than a bitboard.
+    board = game.evaluator.board if game.evaluator else game.board
+    size = game.size
+    levels = [0, 0, 0]
+    for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        r, c = row + dr, col + dc
+        ahead = board[r][c] if 0 <= r < size and 0 <= c < size else 3
+        r, c = row - dr, col - dc
+        behind = board[r][c] if 0 <= r < size and 0 <= c < size else 3
+        for player in (1, 2):
+            if ahead != player and behind != player:
+                continue
+            length = 1
+            r, c = row + dr, col + dc
+            while 0 <= r < size and 0 <= c < size and board[r][c] == player:
+                length += 1
+                r += dr
+                c += dc
+            open_ends = 0 <= r < size and 0 <= c < size and board[r][c] == 0
+            r, c = row - dr, col - dc
+            while 0 <= r < size and 0 <= c < size and board[r][c] == player:
+                length += 1
+                r -= dr
+                c -= dc
+            open_ends += 0 <= r < size and 0 <= c < size and board[r][c] == 0
+            if length >= 5:
+                level = WIN
+            elif length == 4:
+                level = OPEN_FOUR if open_ends == 2 else FOUR if open_ends else 0
+            elif length == 3:
+                level = OPEN_THREE if open_ends == 2 else 0
+            else:
+                continue
+            if level > levels[player]:
+                levels[player] = level
+    return levels
+################################# Threat solver ################################
+@lru_cache(maxsize=None)
+def threat_windows(size):
+    # Every run of five and of six cells as flat indices, the five-runs through
+    # each cell, and the six-runs that contain each five-run.
+    def runs(length):
+        result = []
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            for r in range(size):
+                for c in range(size):
+                    if 0 <= r + (length - 1) * dr < size and 0 <= c + (length - 1) * dc < size:
+                        result.append(tuple((r + i * dr) * size + c + i * dc for i in range(length)))
+        return result
+
+    fives = runs(5)
+    sixes = runs(6)
+    cell_fives = [[] for _ in range(size * size)]
+    for index, window in enumerate(fives):
+        for cell in window:
+            cell_fives[cell].append(index)
+    six_index = {window: index for index, window in enumerate(sixes)}
+    five_sixes = []
+    for window in fives:
+        step = window[1] - window[0]
+        around = [(window[0] - step,) + window, window + (window[-1] + step,)]
+        five_sixes.append([six_index[six] for six in around if six in six_index])
+    return fives, cell_fives, sixes, five_sixes
+
+# The six-cell three shapes from line_patterns, with 1 standing for the attacker.
+THREE_SHAPES = frozenset(
+    tuple(int(ch) for ch in pattern)
+    for pattern in line_patterns(1)
+    if len(pattern) == 6 and pattern.count("1") == 3 and "2" not in pattern
+)
+
+class ThreatBudgetExceeded(Exception):
+    pass
+
+class ThreatSolver:
+    # Threat-space search for a forced win: victory by continuous fours (VCF),
+    # then by fours and open threes (VCT). The attacker only plays moves that
+    # make a four or a three; the defender only answers with the cells that
+    # stop them. The solver keeps its own flat board and, for each player,
+    # the five-cell windows the opponent has no stone in, bucketed by how many
+    # stones the player has there. A window with four stones is a five
+    # threat, one with three marks the moves that make a four. It gives up
+    # after budget nodes, or at deadline (a perf_counter time) when given.
+    def __init__(self, game, budget = 10000, deadline = None):
+        self.size = game.size
+        self.fives, self.cell_fives, self.sixes, self.five_sixes = threat_windows(game.size)
+        self.cells = [cell for row in game.board for cell in row]
+        self.counts = [None, [0] * len(self.fives), [0] * len(self.fives)]
+        self.open = [None, [set() for _ in range(6)], [set() for _ in range(6)]]
+        for index, window in enumerate(self.fives):
+            for cell in window:
+                if self.cells[cell]:
+                    self.counts[self.cells[cell]][index] += 1
+            for player, other in ((1, 2), (2, 1)):
+                if not self.counts[other][index]:
+                    self.open[player][self.counts[player][index]].add(index)
+        self.zobrist = zobrist_keys(game.size)
+        self.hash = game.hash
+        self.budget = budget
+        self.deadline = deadline
+        self.nodes = 0
+        self.failed = set()
+
+    def find_win(self, player, vcf_depth = 12, vct_depth = 5):
+        # First move of a forced win for player as (row, col), or None.
+        try:
+            move = self.attack(player, vcf_depth, False)
+            if move is None:
+                move = self.attack(player, vct_depth, True)
+        except ThreatBudgetExceeded:
+            move = None
+        return divmod(move, self.size) if move is not None else None
+
+    def play(self, cell, player):
+        other = 2 if player == 1 else 1
+        self.cells[cell] = player
+        self.hash ^= self.zobrist[player][cell]
+        for index in self.cell_fives[cell]:
+            mine = self.counts[player][index]
+            theirs = self.counts[other][index]
+            if not theirs:
+                self.open[player][mine].discard(index)
+                self.open[player][mine + 1].add(index)
+            if not mine:
+                self.open[other][theirs].discard(index)
+            self.counts[player][index] = mine + 1
+
+    def unplay(self, cell, player):
+        other = 2 if player == 1 else 1
+        self.cells[cell] = 0
+        self.hash ^= self.zobrist[player][cell]
+        for index in self.cell_fives[cell]:
+            mine = self.counts[player][index] - 1
+            theirs = self.counts[other][index]
+            if not theirs:
+                self.open[player][mine + 1].discard(index)
+                self.open[player][mine].add(index)
+            if not mine:
+                self.open[other][theirs].add(index)
+            self.counts[player][index] = mine
+
+    def squares(self, player, stones):
+        # Empty cells of the windows where player has stones and the opponent none.
+        result = set()
+        for index in self.open[player][stones]:
+            for cell in self.fives[index]:
+                if not self.cells[cell]:
+                    result.add(cell)
+        return result
+
+    def shape(self, window, player):
+        return tuple(0 if not self.cells[cell] else 1 if self.cells[cell] == player else 2 for cell in window)
+
+    def makes_three(self, cell, player):
+        self.cells[cell] = player
+        found = False
+        for index in self.cell_fives[cell]:
+            if self.counts[player][index] == 2 and not self.counts[2 if player == 1 else 1][index]:
+                if any(self.shape(self.sixes[six], player) in THREE_SHAPES for six in self.five_sixes[index]):
+                    found = True
+                    break
+        self.cells[cell] = 0
+        return found
+
+    def three_blocks(self, player):
+        # Empty cells of every open three player has; the defender must take one.
+        result = set()
+        for index in self.open[player][3]:
+            for six in self.five_sixes[index]:
+                window = self.sixes[six]
+                if self.shape(window, player) in THREE_SHAPES:
+                    result.update(cell for cell in window if not self.cells[cell])
+        return result
+
+    def attack(self, attacker, depth, use_threes):
+        self.nodes += 1
+        if self.nodes > self.budget or (self.deadline and not self.nodes & 255
+                                        and time.perf_counter() > self.deadline):
+            raise ThreatBudgetExceeded
+        wins = self.squares(attacker, 4)
+        if wins:
+            return min(wins)
+        defender = 2 if attacker == 1 else 1
+        threats = self.squares(defender, 4)
+        if depth == 0 or len(threats) > 1 or (self.hash, depth, use_threes) in self.failed:
+            return None
+
+        fours = self.squares(attacker, 3)
+        threes = []
+        if use_threes:
+            threes = sorted(cell for cell in self.squares(attacker, 2) - fours if self.makes_three(cell, attacker))
+        candidates = sorted(fours) + threes
+        if threats:
+            # The defender threatens five, so the attacker has to block, and
+            # only keeps the initiative if the block is a threat as well.
+            candidates = [cell for cell in candidates if cell in threats]
+
+        for cell in candidates:
+            self.play(cell, attacker)
+            try:
+                won = self.defend(attacker, depth - 1, use_threes)
+            finally:
+                self.unplay(cell, attacker)
+            if won:
+                return cell
+        self.failed.add((self.hash, depth, use_threes))
+        return None
+
+    def defend(self, attacker, depth, use_threes):
+        # The attacker has just moved; True if every defence still loses.
+        defender = 2 if attacker == 1 else 1
+        if self.squares(defender, 4):
+            return False
+        wins = self.squares(attacker, 4)
+        if len(wins) > 1:
+            return True
+        if wins:
+            replies = wins
+        else:
+            # An open three can be met with a counter-four, which this search
+            # does not follow, so it only claims a win when there is none.
+            if self.squares(defender, 3):
+                return False
+            replies = self.three_blocks(attacker)
+            if not replies:
+                return False
+
+        for cell in replies:
+            self.play(cell, defender)
+            try:
+                won = self.attack(attacker, depth, use_threes) is not None
+            finally:
+                self.unplay(cell, defender)
+            if not won:
+                return False
+        return True
+################################ Transposition #################################
+EXACT, LOWER, UPPER = 0, 1, 2
+
+class TranspositionTable:
+    # Fixed number of slots indexed by the low bits of the Zobrist hash, sized
+    # to the largest power of two that fits in memory_mb. A slot is replaced
+    # when it is empty, was written by an earlier search, or the new entry was
+    # searched at least as deep.
+    ENTRY_BYTES = 200  # one stored tuple plus its slot, roughly, in CPython
+
+    def __init__(self, memory_mb = 64):
+        slots = 1
+        while slots * 2 * self.ENTRY_BYTES <= memory_mb * 1024 * 1024:
+            slots *= 2
+        self.mask = slots - 1
+        self.slots = [None] * slots
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self):
+        self.generation += 1
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key):
+        # Returns (key, depth, flag, score, move, generation) or None.
+        self.probes += 1
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def peek(self, key):
+        # probe without counting towards the hit rate.
+        entry = self.slots[key & self.mask]
+        return entry if entry is not None and entry[0] == key else None
+
+    def store(self, key, depth, flag, score, move):
+        index = key & self.mask
+        old = self.slots[index]
+        if old is None or old[5] != self.generation or depth >= old[1]:
+            self.slots[index] = (key, depth, flag, score, move, self.generation)
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
 #################################### opening ####################################
 def generate_opening_book(board_size):
     center = board_size // 2
@@ -178,11 +867,227 @@ def generate_opening_book(board_size):
         (center + 1, center),
     ]
     return [move for move in opening if 0 <= move[0] < board_size and 0 <= move[1] < board_size]
+
+@lru_cache(maxsize=None)
+def symmetries(size):
+    # The 8 rotations and reflections of the board as cell permutations,
+    # forward[s][cell] being where symmetry s takes cell, and their inverses.
+    n = size - 1
+    maps = (
+        lambda r, c: (r, c), lambda r, c: (c, n - r), lambda r, c: (n - r, n - c), lambda r, c: (n - c, r),
+        lambda r, c: (r, n - c), lambda r, c: (c, r), lambda r, c: (n - r, c), lambda r, c: (n - c, n - r),
+    )
+    forward = []
+    inverse = []
+    for transform in maps:
+        cells = [0] * (size * size)
+        back = [0] * (size * size)
+        for row in range(size):
+            for col in range(size):
+                r, c = transform(row, col)
+                cells[row * size + col] = r * size + c
+                back[r * size + c] = row * size + col
+        forward.append(cells)
+        inverse.append(back)
+    return forward, inverse
+
+def canonical_hash(game):
+    # The smallest Zobrist hash of the position over all 8 symmetries, and
+    # which symmetry gives it. Positions that are rotations or mirror images
+    # of each other share the same canonical hash.
+    forward, _ = symmetries(game.size)
+    keys = game.zobrist
+    hashes = [0] * 8
+    for row in range(game.size):
+        for col in range(game.size):
+            player = game.board[row][col]
+            if player:
+                cell = row * game.size + col
+                for symmetry in range(8):
+                    hashes[symmetry] ^= keys[player][forward[symmetry][cell]]
+    key = min(hashes)
+    return key, hashes.index(key)
+
+# Book file: a header of magic, version, board size, deepest ply and record
+# count, then records sorted by canonical hash. Moves are stored as the cell
+# in the canonical orientation.
+BOOK_MAGIC = b"GMKB"
+BOOK_HEADER = np.dtype([("magic", "S4"), ("version", "<u2"), ("size", "<u2"), ("plies", "<u4"), ("count", "<u4")])
+BOOK_RECORD = np.dtype([("key", "<u8"), ("move", "<u2")])
+BOOK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "books")
+
+class OpeningBook:
+    # Memory-mapped, so opening one reads only the header and a lookup
+    # touches the few pages of its binary search.
+    def __init__(self, path):
+        header = np.fromfile(path, dtype=BOOK_HEADER, count=1)
+        if len(header) != 1 or header["magic"][0] != BOOK_MAGIC or header["version"][0] != 1:
+            raise ValueError(f"{path} is not an opening book")
+        self.size = int(header["size"][0])
+        self.plies = int(header["plies"][0])
+        count = int(header["count"][0])
+        if count:
+            self.records = np.memmap(path, dtype=BOOK_RECORD, mode="r", offset=BOOK_HEADER.itemsize, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=BOOK_RECORD)
+
+    def __len__(self):
+        return len(self.records)
+
+    def lookup(self, game):
+        if game.size != self.size or game.size * game.size - game.empty_count > self.plies:
+            return None
+        key, symmetry = canonical_hash(game)
+        keys = self.records["key"]
+        index = int(np.searchsorted(keys, np.uint64(key)))
+        if index == len(keys) or int(keys[index]) != key:
+            return None
+        _, inverse = symmetries(game.size)
+        row, col = divmod(inverse[symmetry][int(self.records["move"][index])], game.size)
+        return (row, col) if game.is_valid_move(row, col) else None
+
+    @staticmethod
+    def write(path, size, plies, entries):
+        # entries maps canonical hash to the move in canonical orientation.
+        header = np.array([(BOOK_MAGIC, 1, size, plies, len(entries))], dtype=BOOK_HEADER)
+        records = np.array(sorted(entries.items()), dtype=BOOK_RECORD) if entries else np.zeros(0, dtype=BOOK_RECORD)
+        with open(path, "wb") as out:
+            header.tofile(out)
+            records.tofile(out)
+
+@lru_cache(maxsize=None)
+def opening_book(size):
+    # The book for this board size from BOOK_DIR, or None without one.
+    path = os.path.join(BOOK_DIR, f"{size}.book")
+    return OpeningBook(path) if os.path.exists(path) else None
 #################################### player ####################################
+@lru_cache(maxsize=None)
+def evaluator_class(evaluator = None):
+    # The game.evaluator class a search player attaches: the pattern scores
+    # of IncrementalEvaluator by default, the model saved at a path (see
+    # neural.py), BatchEvaluator for "batch", or any class taking the game
+    # with update(row, col, player) and score(player). A batched one also has
+    # stage() and flush(player), scoring every staged position at once, and
+    # may have policy(player).
+    if evaluator is None:
+        return IncrementalEvaluator
+    if evaluator == "batch":
+        return BatchEvaluator
+    if isinstance(evaluator, str):
+        from neural import ConvNet
+        return ConvNet.load(evaluator).evaluator
+    return evaluator
+
+def prepare_search(game, radius, evaluator = None):
+    # Attach the incremental state the search players read from.
+    if type(game.evaluator) is not evaluator_class(evaluator):
+        game.evaluator = evaluator_class(evaluator)(game)
+    if radius and (game.candidates is None or game.candidates.radius != radius):
+        game.candidates = game.candidate_moves(radius)
+
+def copy_game(game):
+    # Same backend and stones, without the attached search state, for
+    # searching away from a game that is still on screen.
+    copy = type(game)(game.size)
+    for row in range(game.size):
+        for col in range(game.size):
+            if game.board[row][col]:
+                copy.make_move(row, col, game.board[row][col])
+    return copy
+
+CUTOFF_SLOTS = 8  # cutoffs are counted by move index, the last slot for all later moves
+
+class SearchStats:
+    # What one get_move did, kept as player.stats. summary() is the line
+    # printed after each move and as_dict() its JSON form.
+    def __init__(self, name, source):
+        self.name = name
+        self.source = source  # "book", "threat", "search" or "mcts"
+        self.move = None
+        self.score = None     # search score, or win rate for MCTS
+        self.nodes = 0        # search nodes, solver nodes or playouts
+        self.evaluations = 0
+        self.cutoffs = [0] * CUTOFF_SLOTS
+        self.depths = []      # (depth, seconds, nodes) for every finished iteration
+        self.pv = []
+        self.tt_hit_rate = None
+        self.reused = 0       # MCTS playouts carried over from the last move
+        self.start = time.perf_counter()
+        self.seconds = 0.0
+
+    @property
+    def depth(self):
+        return self.depths[-1][0] if self.depths else 0
+
+    @property
+    def branching(self):
+        # Effective branching factor: growth of the last iteration over the
+        # one before, or the depth-th root of the nodes after one iteration.
+        if len(self.depths) >= 2 and self.depths[-2][2]:
+            return self.depths[-1][2] / self.depths[-2][2]
+        if self.depths and self.depths[-1][2] > 1:
+            return self.depths[-1][2] ** (1 / self.depths[-1][0])
+        return None
+
+    @property
+    def first_cutoffs(self):
+        # Share of beta cutoffs made by the first move tried.
+        total = sum(self.cutoffs)
+        return self.cutoffs[0] / total if total else None
+
+    def summary(self):
+        if self.source == "book":
+            details = "opening book"
+        elif self.source == "threat":
+            details = f"forced win, {self.nodes} solver nodes"
+        elif self.source == "mcts":
+            details = f"{self.nodes} playouts, {self.reused} reused, win rate {self.score:.1%}"
+        else:
+            details = f"depth {self.depth}, {self.nodes} nodes, {self.evaluations} evaluations"
+            if self.first_cutoffs is not None:
+                details += f", {self.first_cutoffs:.0%} first-move cutoffs"
+            if self.branching:
+                details += f", EBF {self.branching:.1f}"
+            if self.tt_hit_rate is not None:
+                details += f", TT hit rate {self.tt_hit_rate:.1%}"
+            details += ", pv " + " ".join(f"{r},{c}" for r, c in self.pv)
+        row, col = self.move
+        return f"Player: {self.name} played at row: {row}, col: {col} ({details}, {self.seconds:.2f}s)"
+
+    def as_dict(self):
+        return {
+            "player": self.name, "source": self.source, "move": list(self.move), "score": self.score,
+            "seconds": round(self.seconds, 4), "nodes": self.nodes, "evaluations": self.evaluations,
+            "cutoffs": self.cutoffs, "first_cutoffs": self.first_cutoffs, "branching": self.branching,
+            "depths": [{"depth": d, "seconds": round(t, 4), "nodes": n} for d, t, n in self.depths],
+            "pv": [list(move) for move in self.pv], "tt_hit_rate": self.tt_hit_rate, "reused": self.reused,
+        }
+
 class Player:
+    # Set from another thread to end a search early; get_move then returns
+    # the best move found so far and ponder returns.
+    stopped = False
+    # How get_move reports its SearchStats: "text" prints summary(), "json"
+    # prints as_dict() as one JSON line, None stays quiet.
+    log = "text"
+    # Called with the SearchStats while a search runs (after every finished
+    # depth, or every few thousand playouts), possibly from a worker thread.
+    on_progress = None
+
     def __init__(self, player_id, name):
         self.player_id = player_id
         self.name = name
+        self.stats = None
+
+    def report(self, stats, move):
+        stats.move = move
+        stats.seconds = time.perf_counter() - stats.start
+        self.stats = stats
+        if self.log == "json":
+            print(json.dumps(stats.as_dict()))
+        elif self.log:
+            print(stats.summary())
+        return move
 
     def get_move(self, game):
         raise NotImplementedError("This method should be implemented by subclasses.")
@@ -199,13 +1104,67 @@ class HumanPlayer(Player):
                     print("Invalid move. Cell is occupied or out of bounds.")
             except ValueError:
                 print("Please enter numeric values.")
-#################################### Min-Max ###################################
-class MinimaxAIPlayer(Player):
-    def __init__(self, player_id, name, depth = 2):
+################################### Negamax ####################################
+LMR_MOVES = 4  # moves searched at full depth before reductions start
+LMR_DIVISOR = 1.0  # reduction is log(depth) * log(move number) / LMR_DIVISOR
+NULL_MOVE_REDUCTION = 2
+# Largest gain in evaluate_board from a quiet move (broken threes and twos
+# on several lines), applied when at most FUTILITY_DEPTH plies are left.
+FUTILITY_MARGIN = 30000
+FUTILITY_DEPTH = 2
+
+class SearchTimeout(Exception):
+    pass
+
+# Children a depth 1 node has a batched evaluator score at once: small enough
+# to keep most of the cutoffs, large enough for the batch to pay.
+LEAF_BATCH = 8
+
+class SearchPlayer(Player):
+    # Negamax search shared by the minimax and alpha-beta players. Scores are
+    # from the point of view of the side to move.
+    prune = True     # alpha-beta cutoffs; off, every node is searched in full
+    use_pvs = False  # zero-window searches after the first move
+    # Selective search, all needing prune: late move reductions, null-move
+    # pruning and futility pruning.
+    use_lmr = False
+    use_null_move = False
+    use_futility = False
+    use_book = True  # play early moves from the opening book when it has them
+    stop_event = None  # set by the parent to stop a search_root_parallel worker
+
+    def __init__(self, player_id, name, depth = 2, radius = 2, tt_memory_mb = 64, seed = None, evaluator = None):
         super().__init__(player_id, name)
         self.max_depth = depth
+        self.radius = radius  # None searches every empty cell
+        self.evaluator = evaluator  # see evaluator_class; None for the pattern scores
+        self.tt_memory_mb = tt_memory_mb
+        self.tt = TranspositionTable(tt_memory_mb) if tt_memory_mb else None
+        self.rng = random.Random(seed) if seed is not None else random
+        self.nodes = 0
+        self.deadline = None
+        self.search_depth = depth
+        self.null_move = False
+        self.evaluations = 0
+        self.cutoffs = [0] * CUTOFF_SLOTS
+
+    def search_stats(self, source):
+        stats = SearchStats(self.name, source)
+        stats.nodes = self.nodes
+        stats.evaluations = self.evaluations
+        stats.cutoffs = self.cutoffs[:]
+        if self.tt:
+            stats.tt_hit_rate = self.tt.hit_rate()
+        return stats
+
+    def opening_move(self, game):
+        if not self.use_book:
+            return None
+        book = opening_book(game.size)
+        move = book.lookup(game) if book else None
+        if move:
+            return move
 
-    def get_move(self, game):
         legal_moves = game.get_legal_moves()
         opening = generate_opening_book(game.size)
 
@@ -213,142 +1172,762 @@ class MinimaxAIPlayer(Player):
         if move_num < len(opening):
             valid_opening_moves = [move for move in opening if game.is_valid_move(*move)]
             if valid_opening_moves:
-                move = random.choice(valid_opening_moves)
-                return move
+                return self.rng.choice(valid_opening_moves)
+        return None
+
+    def begin_search(self, game, time_limit):
+        if self.tt:
+            self.tt.new_search()
+        self.nodes = 0
+        self.evaluations = 0
+        self.cutoffs = [0] * CUTOFF_SLOTS
+        self.deadline = time.perf_counter() + time_limit if time_limit else None
+
+    def out_of_time(self):
+        return (self.stopped or self.deadline and time.perf_counter() > self.deadline
+                or self.stop_event is not None and self.stop_event.is_set())
 
-        best_score = -math.inf
-        best_moves = []
-        for move in game.get_legal_moves():
+    def ponder(self, game):
+        # Search the opponent's turn until stopped. The transposition table,
+        # killers and history it leaves behind serve the next get_move.
+        prepare_search(game, self.radius, self.evaluator)
+        self.begin_search(game, None)
+        opponent = 2 if self.player_id == 1 else 1
+        try:
+            for depth in range(1, game.empty_count + 1):
+                self.search_depth = depth
+                self.negamax(game, depth, -math.inf, math.inf, opponent)
+        except SearchTimeout:
+            pass
+
+    def search_root(self, game, moves, depth, alpha = -math.inf, beta = math.inf, scores = None):
+        # Root moves are searched with the window kept one below the best
+        # score so far: moves tied with the best come back exact and the rest
+        # as upper bounds below it (scores are whole numbers). Scores go into
+        # the scores dict when given, which keeps them if the search times out.
+        self.search_depth = depth
+        opponent = 2 if self.player_id == 1 else 1
+        scores = {} if scores is None else scores
+        best = -math.inf
+
+        for move in moves:
+            floor = max(alpha, best - 1) if self.prune else -math.inf
             row, col = move
             game.make_move(row, col, self.player_id)
-            score = self.minimax(game, depth=self.max_depth - 1, maximizing = False)
-            game.undo_move(row, col)
-
-            if score > best_score:
-                best_score = score
-                best_moves = [move]
-            elif score == best_score:
-                best_moves.append(move)
+            try:
+                if self.use_pvs and scores:
+                    score = -self.negamax(game, depth - 1, -floor - 1, -floor, opponent)
+                    if floor < score < beta:
+                        score = -self.negamax(game, depth - 1, -beta, -floor, opponent)
+                else:
+                    score = -self.negamax(game, depth - 1, -beta, -floor, opponent)
+            finally:
+                game.undo_move(row, col)
+            scores[move] = score
+            best = max(best, score)
+            if self.prune and best >= beta:
+                break
 
-        best = random.choice(best_moves)
-        rowi , coli = best
-        print(f"player: {self.name} played at row: {rowi}, col: {coli}.")
-        return best if best_moves else random.choice(game.get_legal_moves())
+        return scores
 
-    def minimax(self, game, depth, maximizing):
-        current_player = self.player_id if maximizing else (2 if self.player_id == 1 else 1)
+    def negamax(self, game, depth, alpha, beta, player):
+        self.nodes += 1
+        if not self.nodes & 255 and self.out_of_time():
+            raise SearchTimeout
+        opponent = 2 if player == 1 else 1
 
-        if game.check_win(self.player_id):
-            return 1e6 + depth  
-        if game.check_win(2 if self.player_id == 1 else 1):
-            return -1e6 - depth  
+        if game.check_win(player):
+            return 1e6 + depth
+        if game.check_win(opponent):
+            return -1e6 - depth
         if game.is_draw() or depth == 0:
-            return evaluate_board(game.board, self.player_id)
+            self.evaluations += 1
+            return game.evaluate(player)
 
-        legal_moves = game.get_legal_moves()
-        if maximizing:
-            max_eval = -math.inf
-            for move in legal_moves:
-                game.make_move(move[0], move[1], current_player)
-                eval = self.minimax(game, depth - 1, False)
-                game.undo_move(move[0], move[1])
-                max_eval = max(max_eval, eval)
-            return max_eval
-        else:
-            min_eval = math.inf
-            for move in legal_moves:
-                game.make_move(move[0], move[1], current_player)
-                eval = self.minimax(game, depth - 1, True)
+        tt_move = None
+        if self.tt:
+            entry = self.tt.probe(game.hash)
+            if entry:
+                tt_move = entry[4]
+                if entry[1] >= depth:
+                    if entry[2] == EXACT:
+                        return entry[3]
+                    if entry[2] == LOWER:
+                        alpha = max(alpha, entry[3])
+                    else:
+                        beta = min(beta, entry[3])
+                    if alpha >= beta:
+                        return entry[3]
+
+        # Null move: let the opponent play twice. If a reduced search still
+        # fails high, a real move will too; an extra stone never hurts in
+        # Gomoku, so there is no zugzwang to guard against. Skipped when the
+        # static score is below beta, which covers facing a four or an open
+        # three, and at most once per line.
+        if (self.use_null_move and depth > NULL_MOVE_REDUCTION and not self.null_move
+                and beta < 1e6 and game.evaluate(player) >= beta):
+            self.null_move = True
+            game.hash ^= NULL_MOVE_KEY
+            try:
+                score = -self.negamax(game, depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + 1, opponent)
+            finally:
+                game.hash ^= NULL_MOVE_KEY
+                self.null_move = False
+            if score >= beta:
+                return beta
+
+        # Futility: near the leaves, quiet moves cannot lift a static score
+        # this far below alpha.
+        futility = None
+        if self.use_futility and depth <= FUTILITY_DEPTH and abs(alpha) < 1e6:
+            futility = game.evaluate(player) + FUTILITY_MARGIN
+            if futility > alpha:
+                futility = None
+
+        alpha_start, beta_start = alpha, beta
+        ply = self.search_depth - depth
+        legal_moves = self.order_moves(game, self.search_moves(game), player, ply, tt_move)
+        value = -math.inf
+        best_move = None
+        if depth == 1 and getattr(game.evaluator, "batched", False):
+            # The children are all leaves: score them in one batch instead.
+            value, best_move = self.score_leaves(game, legal_moves, player, beta, ply)
+            legal_moves = ()
+        for index, move in enumerate(legal_moves):
+            late = index >= LMR_MOVES and self.use_lmr and depth >= 3
+            quiet = (late or futility is not None) and index and self.is_quiet(game, move, ply)
+            if futility is not None and quiet:
+                value = max(value, futility)
+                continue
+
+            game.make_move(move[0], move[1], player)
+            try:
+                score = None
+                if late and quiet:
+                    # Late quiet moves are searched shallower first, more so
+                    # the later they come and the deeper the node.
+                    reduction = min(depth - 2, max(1, int(math.log(depth) * math.log(index) / LMR_DIVISOR)))
+                    score = -self.negamax(game, depth - 1 - reduction, -alpha - 1, -alpha, opponent)
+                if score is None or score > alpha:
+                    if self.use_pvs and index:
+                        # Later moves only need to be proven worse than alpha;
+                        # one that is not gets searched again with the full window.
+                        score = -self.negamax(game, depth - 1, -alpha - 1, -alpha, opponent)
+                        if alpha < score < beta:
+                            score = -self.negamax(game, depth - 1, -beta, -alpha, opponent)
+                    else:
+                        score = -self.negamax(game, depth - 1, -beta, -alpha, opponent)
+            finally:
                 game.undo_move(move[0], move[1])
-                min_eval = min(min_eval, eval)
-            return min_eval
+            if score > value:
+                value = score
+                best_move = move
+            if self.prune:
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    self.cutoffs[min(index, CUTOFF_SLOTS - 1)] += 1
+                    self.record_cutoff(move, player, depth, ply)
+                    break
+
+        if self.tt:
+            if value <= alpha_start:
+                flag = UPPER
+            elif value >= beta_start:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self.tt.store(game.hash, depth, flag, value, best_move)
+        return value
+
+    def score_leaves(self, game, moves, player, beta, ply):
+        # What the move loop would find at depth 1, with the children that
+        # neither win nor fill the board scored LEAF_BATCH at a time by
+        # evaluator.flush(), in move order so that a cutoff still saves the rest.
+        if self.out_of_time():
+            raise SearchTimeout
+        opponent = 2 if player == 1 else 1
+        value = -math.inf
+        best_move = None
+        for first in range(0, len(moves), LEAF_BATCH):
+            chunk = moves[first:first + LEAF_BATCH]
+            scores = [0] * len(chunk)
+            staged = []
+            for index, (row, col) in enumerate(chunk):
+                game.make_move(row, col, player)
+                if game.check_win(player):
+                    scores[index] = 1e6
+                elif game.is_draw():
+                    scores[index] = -game.evaluate(opponent)
+                    self.evaluations += 1
+                else:
+                    game.evaluator.stage()
+                    staged.append(index)
+                game.undo_move(row, col)
+            for index, score in zip(staged, game.evaluator.flush(opponent)):
+                scores[index] = -score
+            self.nodes += len(chunk)
+            self.evaluations += len(staged)
+            for index, score in enumerate(scores):
+                if score > value:
+                    value = score
+                    best_move = chunk[index]
+                if self.prune and value >= beta:
+                    self.cutoffs[min(first + index, CUTOFF_SLOTS - 1)] += 1
+                    self.record_cutoff(best_move, player, 1, ply)
+                    return value, best_move
+        return value, best_move
+
+    def principal_variation(self, game, move, depth):
+        # move followed by the best replies stored in the transposition table.
+        pv = [move]
+        player = self.player_id
+        game.make_move(move[0], move[1], player)
+        while self.tt and len(pv) < depth and not game.winner:
+            entry = self.tt.peek(game.hash)
+            if entry is None or entry[4] is None or not game.is_valid_move(*entry[4]):
+                break
+            player = 2 if player == 1 else 1
+            game.make_move(entry[4][0], entry[4][1], player)
+            pv.append(entry[4])
+        for row, col in reversed(pv):
+            game.undo_move(row, col)
+        return pv
+
+    def search_moves(self, game):
+        if self.radius:
+            return game.get_candidate_moves()
+        return game.get_legal_moves()
+
+    def order_moves(self, game, moves, player, ply, first = None):
+        if first in moves:
+            moves = [first] + [move for move in moves if move != first]
+        return moves
+
+    def record_cutoff(self, move, player, depth, ply):
+        pass
+
+    def is_quiet(self, game, move, ply):
+        # Neither makes nor blocks a three or a four.
+        levels = threat_levels(game, move[0], move[1])
+        return not (levels[1] or levels[2])
+#################################### Min-Max ###################################
+class MinimaxAIPlayer(SearchPlayer):
+    prune = False
+
+    def __init__(self, player_id, name, depth = 2, radius = 2, tt_memory_mb = 64, seed = None, evaluator = None):
+        super().__init__(player_id, name, depth, radius, tt_memory_mb, seed, evaluator)
+
+    def get_move(self, game):
+        start = time.perf_counter()
+        move = self.opening_move(game)
+        if move:
+            return self.report(SearchStats(self.name, "book"), move)
+
+        prepare_search(game, self.radius, self.evaluator)
+        self.begin_search(game, None)
+        moves = self.search_moves(game)
+        # Stopped early, it plays the best of the root moves searched so far,
+        # or the first move if none was.
+        scores = {}
+        try:
+            self.search_root(game, moves, self.max_depth, scores=scores)
+        except SearchTimeout:
+            pass
+        best_score = max(scores.values()) if scores else None
+        best_moves = [move for move in scores if scores[move] == best_score] or moves[:1]
+
+        best = self.rng.choice(best_moves)
+        stats = self.search_stats("search")
+        stats.start = start
+        stats.score = best_score
+        if len(scores) == len(moves):
+            stats.depths.append((self.max_depth, time.perf_counter() - start, self.nodes))
+        stats.pv = self.principal_variation(game, best, self.max_depth)
+        return self.report(stats, best)
 ################################### Alpha-Beta #################################
-class AlphaBetaAIPlayer(Player):
-    def __init__(self, player_id, name, depth = 2):
+THREAT_TIME_SHARE = 0.5  # of a timed move the threat solver may use at most
+PARALLEL_POLL = 0.05  # seconds between looks at stopped while the workers search
+
+class AlphaBetaAIPlayer(SearchPlayer):
+    def __init__(self, player_id, name, depth = 2, radius = 2, use_threats = True, use_killers = True, use_history = True,
+                 tt_memory_mb = 64, time_limit = None, workers = 1, seed = None, threat_budget = 10000,
+                 use_pvs = True, aspiration = 2000, use_lmr = False, use_null_move = False, use_futility = False,
+                 evaluator = None):
+        super().__init__(player_id, name, depth, radius, tt_memory_mb, seed, evaluator)
+        self.use_threats = use_threats
+        self.use_killers = use_killers
+        self.use_history = use_history
+        self.use_pvs = use_pvs
+        self.use_lmr = use_lmr
+        self.use_null_move = use_null_move
+        self.use_futility = use_futility
+        # Half width of the window around the previous depth's score when
+        # deepening; 0 searches every depth with a full window.
+        self.aspiration = aspiration
+        # Seconds per move. When set, depth is ignored: the search deepens one
+        # ply at a time until the time is up and plays the last finished depth.
+        self.time_limit = time_limit
+        # With workers > 1 the root moves are split across a process pool.
+        # Moves tied with a chunk's best score come back exact, so the set of
+        # best moves does not depend on the split and a seed makes the chosen
+        # move reproducible.
+        self.workers = workers
+        self.pool = None
+        self.worker_stop = None  # set to stop the pool's searches, see search_root_parallel
+        self.threat_budget = threat_budget  # ThreatSolver nodes before each search, 0 to skip
+
+        self.history = {}  # (player, move) -> cutoff weight, kept between moves
+        self.killers = []
+        self.completed_depth = 0  # deepest finished iteration of the last search
+
+    def get_move(self, game):
+        start = time.perf_counter()
+        move = self.opening_move(game)
+        if move:
+            return self.report(SearchStats(self.name, "book"), move)
+
+        # time_limit counts from here. The solver may spend up to
+        # THREAT_TIME_SHARE of it, and the search gets whatever is left.
+        deadline = start + self.time_limit if self.time_limit else None
+        if self.threat_budget:
+            solver = ThreatSolver(game, self.threat_budget, deadline and start + self.time_limit * THREAT_TIME_SHARE)
+            win = solver.find_win(self.player_id)
+            if win:
+                stats = SearchStats(self.name, "threat")
+                stats.start = start
+                stats.nodes = solver.nodes
+                return self.report(stats, win)
+
+        prepare_search(game, self.radius, self.evaluator)
+        self.begin_search(game, deadline and max(deadline - time.perf_counter(), 1e-3))
+        depths = range(1, game.empty_count + 1) if self.time_limit else [self.max_depth]
+
+        moves = self.order_moves(game, self.search_moves(game), self.player_id, 0)
+        best_moves = moves[:1]
+        best_score = None
+        completed = 0
+        iterations = []
+        for depth in depths:
+            iteration_start, iteration_nodes = time.perf_counter(), self.nodes
+            try:
+                scores = self.search_window(game, moves, depth, best_score)
+            except SearchTimeout:
+                break
+            completed = depth
+            iterations.append((depth, time.perf_counter() - iteration_start, self.nodes - iteration_nodes))
+            best_score = max(scores.values())
+            best_moves = [move for move in moves if scores[move] == best_score]
+            # The next iteration starts from this one's best line.
+            moves = sorted(moves, key=lambda move: scores[move], reverse=True)
+            if self.on_progress:
+                stats = self.search_stats("search")
+                stats.start = start
+                stats.score = best_score
+                stats.depths = iterations[:]
+                stats.pv = self.principal_variation(game, best_moves[0], depth)
+                self.on_progress(stats)
+            if abs(best_score) >= 1e6:
+                break
+        self.completed_depth = completed
+
+        best = self.rng.choice(best_moves)
+        stats = self.search_stats("search")
+        stats.start = start
+        stats.score = best_score
+        stats.depths = iterations
+        stats.pv = self.principal_variation(game, best, completed)
+        return self.report(stats, best)
+
+    def begin_search(self, game, time_limit):
+        super().begin_search(game, time_limit)
+        self.killers = [[] for _ in range(game.empty_count + 1)]
+        for key in self.history:
+            self.history[key] //= 2
+
+    def search_window(self, game, moves, depth, guess = None):
+        # Aspiration window around the previous depth's score, widened on
+        # the side that fails.
+        alpha, beta = -math.inf, math.inf
+        if guess is not None and self.aspiration and abs(guess) < 1e6:
+            alpha, beta = guess - self.aspiration, guess + self.aspiration
+        while True:
+            if self.workers > 1:
+                scores = self.search_root_parallel(game, moves, depth, alpha, beta)
+            else:
+                scores = self.search_root(game, moves, depth, alpha, beta)
+            best_score = max(scores.values())
+            if best_score <= alpha:
+                alpha = -math.inf
+            elif best_score >= beta:
+                beta = math.inf
+            else:
+                return scores
+
+    def search_root_parallel(self, game, moves, depth, alpha = -math.inf, beta = math.inf):
+        if self.pool is None:
+            self.worker_stop = multiprocessing.Event()
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=set_worker_stop,
+                                            initargs=(self.worker_stop,))
+        settings = {
+            "player_id": self.player_id, "name": self.name, "depth": depth, "radius": self.radius,
+            "use_threats": self.use_threats, "use_killers": self.use_killers, "use_history": self.use_history,
+            "use_pvs": self.use_pvs, "use_lmr": self.use_lmr, "use_null_move": self.use_null_move,
+            "use_futility": self.use_futility, "tt_memory_mb": self.tt_memory_mb // self.workers if self.tt_memory_mb else 0,
+            "evaluator": self.evaluator,
+        }
+        # The first move is searched here, and its score is the floor for the
+        # rest: a chunk without a strong move of its own to bound it otherwise
+        # searches many times the nodes of the whole serial search.
+        scores = self.search_root(game, moves[:1], depth, alpha, beta)
+        best = max(scores.values())
+        if best >= beta or len(moves) == 1:
+            return scores
+        floor = max(alpha, best - 1)
+
+        stones = [(r, c, game.board[r][c]) for r in range(game.size) for c in range(game.size) if game.board[r][c]]
+        time_left = self.deadline - time.perf_counter() if self.deadline else None
+        # Interleaved chunks so every worker gets some of the promising moves.
+        rest = moves[1:]
+        chunks = [rest[i::self.workers * 2] for i in range(self.workers * 2)]
+        tasks = [(settings, type(game), game.size, stones, chunk, depth, floor, beta, time_left) for chunk in chunks if chunk]
+
+        # stopped is checked while waiting, so the GUI and the server's timer
+        # can end a fixed-depth search too; the workers are told through
+        # worker_stop and waited for, leaving the pool free for the next search.
+        futures = [self.pool.submit(search_root_task, task) for task in tasks]
+        pending = futures
+        while pending:
+            if self.stopped:
+                self.worker_stop.set()
+                for future in pending:
+                    future.cancel()
+                wait(pending)
+                self.worker_stop.clear()
+                raise SearchTimeout
+            pending = wait(pending, timeout=PARALLEL_POLL).not_done
+
+        for future in futures:
+            chunk_scores, nodes, probes, hits, evaluations, cutoffs = future.result()
+            if chunk_scores is None:
+                raise SearchTimeout
+            scores.update(chunk_scores)
+            self.nodes += nodes
+            self.evaluations += evaluations
+            self.cutoffs = [a + b for a, b in zip(self.cutoffs, cutoffs)]
+            if self.tt:
+                self.tt.probes += probes
+                self.tt.hits += hits
+        return scores
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def order_moves(self, game, moves, player, ply, first = None):
+        # The transposition table's move first, then winning and forced moves
+        # (own threat of a level ahead of blocking the same level), then this
+        # ply's killers, then the evaluator's policy when it has one, then
+        # history.
+        moves = super().order_moves(game, moves, player, ply, first)
+        if not (self.use_threats or self.use_killers or self.use_history or hasattr(game.evaluator, "policy")):
+            return moves
+        opponent = 2 if player == 1 else 1
+        killers = self.killers[ply] if self.use_killers else ()
+        # Just above the leaves, scoring a child costs less than scanning it
+        # for threats, so only killers and history order those nodes.
+        scan_threats = self.use_threats and (ply == 0 or ply < self.search_depth - 1)
+        policy = None
+        if hasattr(game.evaluator, "policy") and (ply == 0 or ply < self.search_depth - 1):
+            policy = game.evaluator.policy(player)
+        keyed = []
+        for move in moves:
+            threat = 0
+            if scan_threats:
+                levels = threat_levels(game, move[0], move[1])
+                threat = max(2 * levels[player], 2 * levels[opponent] - 1)
+            history = self.history.get((player, move), 0) if self.use_history else 0
+            prior = policy[move[0] * game.size + move[1]] if policy is not None else 0
+            keyed.append(((move == first, threat, move in killers, prior, history), move))
+        keyed.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in keyed]
+
+    def is_quiet(self, game, move, ply):
+        if self.use_killers and move in self.killers[ply]:
+            return False
+        return super().is_quiet(game, move, ply)
+
+    def record_cutoff(self, move, player, depth, ply):
+        if self.use_killers and move not in self.killers[ply]:
+            self.killers[ply] = [move] + self.killers[ply][:1]
+        if self.use_history:
+            self.history[(player, move)] = self.history.get((player, move), 0) + depth * depth
+# Worker side of AlphaBetaAIPlayer.search_root_parallel. Players are kept per
+# process so their transposition table and history carry over between tasks.
+worker_players = {}
+worker_stop = None  # the parent's worker_stop event
+
+def set_worker_stop(event):
+    global worker_stop
+    worker_stop = event
+
+def search_root_task(task):
+    settings, backend, size, stones, moves, depth, alpha, beta, time_left = task
+    key = tuple(sorted(settings.items()))
+    player = worker_players.get(key)
+    if player is None:
+        player = worker_players[key] = AlphaBetaAIPlayer(**settings)
+        player.stop_event = worker_stop
+
+    game = backend(size)
+    for row, col, stone in stones:
+        game.make_move(row, col, stone)
+    prepare_search(game, player.radius, player.evaluator)
+    player.begin_search(game, time_left)
+    try:
+        scores = player.search_root(game, moves, depth, alpha, beta)
+    except SearchTimeout:
+        scores = None
+    tt = player.tt
+    return scores, player.nodes, tt.probes if tt else 0, tt.hits if tt else 0, player.evaluations, player.cutoffs
+##################################### MCTS #####################################
+class MCTSNode:
+    __slots__ = ("move", "player", "hash", "parent", "children", "untried", "visits", "wins")
+
+    def __init__(self, move, player, hash, parent):
+        self.move = move      # the move that led here, None at the root
+        self.player = player  # who played it; wins are counted for them
+        self.hash = hash
+        self.parent = parent
+        self.children = []
+        self.untried = None   # moves not expanded yet, strongest last
+        self.visits = 0
+        self.wins = 0.0
+
+def five_at(cells, size, index, player):
+    # Whether the stone at flat index completes five for player.
+    row, col = divmod(index, size)
+    for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        count = 1
+        r, c = row + dr, col + dc
+        while 0 <= r < size and 0 <= c < size and cells[r * size + c] == player:
+            count += 1
+            r += dr
+            c += dc
+        r, c = row - dr, col - dc
+        while 0 <= r < size and 0 <= c < size and cells[r * size + c] == player:
+            count += 1
+            r -= dr
+            c -= dc
+        if count >= 5:
+            return True
+    return False
+
+class MCTSAIPlayer(Player):
+    # Monte Carlo tree search with UCT. Each iteration walks the tree on the
+    # game itself, expands one move and finishes the game with a random
+    # playout among cells next to stones. The subtree under the moves actually
+    # played is kept for the next call.
+    def __init__(self, player_id, name, time_limit = 1.0, playouts = None, radius = 1, exploration = 1.4,
+                 seed = None, threat_budget = 10000):
         super().__init__(player_id, name)
-        self.max_depth = depth
+        self.time_limit = time_limit  # seconds per move, unless playouts is set
+        self.playouts = playouts      # fixed iterations per move, for reproducible play
+        self.radius = radius          # tree moves are empty cells this close to a stone
+        self.exploration = exploration
+        self.threat_budget = threat_budget  # ThreatSolver nodes before each search, 0 to skip
+        self.rng = random.Random(seed) if seed is not None else random
+        self.root = None
+        self.iterations = 0
 
     def get_move(self, game):
-        legal_moves = game.get_legal_moves()
-        opening = generate_opening_book(game.size)
+        stats = SearchStats(self.name, "mcts")
+        if game.empty_count == game.size * game.size:
+            stats.source = "book"
+            return self.report(stats, (game.size // 2, game.size // 2))
 
-        move_num = game.size * game.size - len(legal_moves)
-        if move_num < len(opening):
-            valid_opening_moves = [move for move in opening if game.is_valid_move(*move)]
-            if valid_opening_moves:
-                move = random.choice(valid_opening_moves)
-                return move
+        # As for alpha-beta, the solver's time comes out of time_limit. With
+        # playouts fixed it has only its node budget, so play is reproducible.
+        deadline = stats.start + self.time_limit
+        if self.threat_budget:
+            solver = ThreatSolver(game, self.threat_budget,
+                                  None if self.playouts else stats.start + self.time_limit * THREAT_TIME_SHARE)
+            win = solver.find_win(self.player_id)
+            if win:
+                stats.source = "threat"
+                stats.nodes = solver.nodes
+                return self.report(stats, win)
 
-        best_score = -math.inf
-        best_moves = []
-        alpha = -math.inf
-        beta = math.inf
+        if game.candidates is None or game.candidates.radius != self.radius:
+            game.candidates = game.candidate_moves(self.radius)
+        root = self.reuse_root(game, self.player_id)
+        stats.reused = root.visits
+        self.iterations = 0
+        while not self.iterations or not self.stopped and (
+                self.iterations < self.playouts if self.playouts else time.perf_counter() < deadline):
+            self.iterate(game, root)
+            self.iterations += 1
+            if self.on_progress and not self.iterations % 2048:
+                self.on_progress(self.tree_stats(stats, root))
 
-        for move in game.get_legal_moves():
-            row, col = move
-            game.make_move(row, col, self.player_id)
-            score = self.alphabeta(game, depth=self.max_depth - 1, alpha=alpha, beta=beta, maximizing=False)
-            game.undo_move(row, col)
+        best = max(root.children, key=lambda child: child.visits)
+        self.tree_stats(stats, root)
+        self.root = best
+        best.parent = None
+        return self.report(stats, best.move)
 
-            if score > best_score:
-                best_score = score
-                best_moves = [move]
-            elif score == best_score:
-                best_moves.append(move)
+    def tree_stats(self, stats, root):
+        # Playouts so far, the win rate of the most visited move and the line
+        # of most visited moves below the root.
+        stats.nodes = stats.evaluations = self.iterations
+        stats.pv = []
+        node = root
+        while node.children:
+            node = max(node.children, key=lambda child: child.visits)
+            stats.pv.append(node.move)
+        if stats.pv:
+            best = max(root.children, key=lambda child: child.visits)
+            stats.score = best.wins / best.visits
+        return stats
 
-        best = random.choice(best_moves)
-        rowi , coli = best
-        print(f"Player: {self.name} played at row: {rowi}, col: {coli}")
-        return best if best_moves else random.choice(game.get_legal_moves())
+    def ponder(self, game):
+        # Grow the tree on the opponent's turn until stopped; get_move picks
+        # up the subtree under their reply.
+        if game.candidates is None or game.candidates.radius != self.radius:
+            game.candidates = game.candidate_moves(self.radius)
+        self.root = self.reuse_root(game, 2 if self.player_id == 1 else 1)
+        while not self.stopped:
+            self.iterate(game, self.root)
 
-    def alphabeta(self, game, depth, alpha, beta, maximizing):
-        current_player = self.player_id if maximizing else (2 if self.player_id == 1 else 1)
+    def reuse_root(self, game, to_move):
+        # The kept subtree, if the game went on from it by up to two moves,
+        # or else a new root for to_move to play from.
+        if self.root is not None:
+            if self.root.hash == game.hash:
+                return self.root
+            for child in self.root.children:
+                if child.hash == game.hash:
+                    child.parent = None
+                    return child
+                for grandchild in child.children:
+                    if grandchild.hash == game.hash:
+                        grandchild.parent = None
+                        return grandchild
+        return MCTSNode(None, 2 if to_move == 1 else 1, game.hash, None)
 
-        if game.check_win(self.player_id):
-            return 1e6 + depth
-        if game.check_win(2 if self.player_id == 1 else 1):
-            return -1e6 - depth
-        if game.is_draw() or depth == 0:
-            return evaluate_board(game.board, self.player_id)
+    def iterate(self, game, root):
+        node = root
+        path = []
+        # Selection: follow UCT while every move of the node has been tried.
+        while node.untried == [] and node.children and not game.winner:
+            log_visits = math.log(node.visits)
+            node = max(node.children, key=lambda child: child.wins / child.visits
+                       + self.exploration * math.sqrt(log_visits / child.visits))
+            game.make_move(node.move[0], node.move[1], node.player)
+            path.append(node.move)
 
-        legal_moves = game.get_legal_moves()
-        if maximizing:
-            value = -math.inf
-            for move in legal_moves:
-                game.make_move(move[0], move[1], current_player)
-                value = max(value, self.alphabeta(game, depth - 1, alpha, beta, False))
-                game.undo_move(move[0], move[1])
-                alpha = max(alpha, value)
-                if alpha >= beta:
-                    break 
-            return value
+        # Expansion.
+        if not game.winner and not game.is_draw():
+            if node.untried is None:
+                node.untried = self.expansion_moves(game, 2 if node.player == 1 else 1)
+            if node.untried:
+                move = node.untried.pop()
+                player = 2 if node.player == 1 else 1
+                game.make_move(move[0], move[1], player)
+                path.append(move)
+                child = MCTSNode(move, player, game.hash, node)
+                node.children.append(child)
+                node = child
+
+        if game.winner:
+            winner = game.winner
+        elif game.is_draw():
+            winner = 0
         else:
-            value = math.inf
-            for move in legal_moves:
-                game.make_move(move[0], move[1], current_player)
-                value = min(value, self.alphabeta(game, depth - 1, alpha, beta, True))
-                game.undo_move(move[0], move[1])
-                beta = min(beta, value)
-                if beta <= alpha:
-                    break 
-            return value
+            winner = self.playout(game, 2 if node.player == 1 else 1)
+        for row, col in reversed(path):
+            game.undo_move(row, col)
+
+        # Backpropagation.
+        while node is not None:
+            node.visits += 1
+            if winner == node.player:
+                node.wins += 1
+            elif not winner:
+                node.wins += 0.5
+            node = node.parent
+
+    def expansion_moves(self, game, player):
+        # Shuffled, then stable-sorted so that moves making or blocking the
+        # strongest threat are expanded first.
+        moves = game.get_candidate_moves()
+        self.rng.shuffle(moves)
+        opponent = 2 if player == 1 else 1
+
+        def threat(move):
+            levels = threat_levels(game, move[0], move[1])
+            return max(2 * levels[player], 2 * levels[opponent] - 1)
+        moves.sort(key=threat)
+        return moves
+
+    def playout(self, game, player):
+        # Random game to the end among empty cells next to stones. A cell is
+        # listed once per neighbouring stone, so crowded cells come up more.
+        size = game.size
+        cells = [cell for row in game.board for cell in row]
+        near = neighbourhoods(size, 1)
+        moves = sorted(game.candidates.moves)
+        rng = self.rng
+        while moves:
+            i = rng.randrange(len(moves))
+            index = moves[i]
+            moves[i] = moves[-1]
+            moves.pop()
+            if cells[index]:
+                continue
+            cells[index] = player
+            if five_at(cells, size, index, player):
+                return player
+            moves.extend(cell for cell in near[index] if not cells[cell])
+            player = 2 if player == 1 else 1
+        return 0
 #################################### Type #####################################
+PLAYER_TYPES = ("Human", "Minimax AI", "Alpha-Beta AI", "MCTS AI")
+
+def create_player(player_id, name, player_type, depth = 2, time_limit = None, seed = None, evaluator = None):
+    # Builds a player from the settings the setup page and the tournament
+    # runner offer. time_limit is seconds per move: alpha-beta then deepens
+    # until it runs out, and MCTS plays out for that long (1s when unset).
+    # evaluator is for the search players, see evaluator_class.
+    if player_type == "Human":
+        return HumanPlayer(player_id, name)
+    elif player_type == "Minimax AI":
+        return MinimaxAIPlayer(player_id, name, depth, seed=seed, evaluator=evaluator)
+    elif player_type == "Alpha-Beta AI":
+        return AlphaBetaAIPlayer(player_id, name, depth, time_limit=time_limit, seed=seed, evaluator=evaluator)
+    elif player_type == "MCTS AI":
+        return MCTSAIPlayer(player_id, name, time_limit=time_limit or 1.0, seed=seed)
+    raise ValueError(f"Unknown player type: {player_type}")
+
 def choose_player(player_id):
     print(f"\nSelect type for Player {player_id}:")
     print("1. Human")
     print("2. Minimax AI")
     print("3. Alpha-Beta AI")
+    print("4. MCTS AI")
     while True:
         try:
-            choice = int(input("Enter your choice (1-3): "))
-            if choice in [1, 2, 3]:
+            choice = int(input("Enter your choice (1-4): "))
+            if choice in [1, 2, 3, 4]:
                 name = input(f"Enter name for Player {player_id}: ")
                 if choice == 1:
                     return HumanPlayer(player_id, name)
                 elif choice == 2:
                     return MinimaxAIPlayer(player_id, name)
-                else:
+                elif choice == 3:
                     return AlphaBetaAIPlayer(player_id, name)
+                else:
+                    return MCTSAIPlayer(player_id, name)
             else:
                 print("Invalid choice.")
         except ValueError:
@@ -359,14 +1938,24 @@ class GomokuGUI:
         self.root = root
         self.root.title("Gomoku Game")
         self.root.geometry("900x700")
-        pygame.mixer.init()
         self.load_sounds()
         self.setup_styles()
+        # AI moves and pondering run in worker threads on a copy of the game.
+        # Results come back through the queue tagged with the job number;
+        # cancelling bumps the number, so late results are dropped.
+        self.players = []
+        self.job = 0
+        self.thread = None
+        self.thinking = False
+        self.results = queue.Queue()
+        self.ai_pending = None  # the scheduled ai_move or poll_ai call
+        self.redraw_pending = None
         self.show_setup_page()
         self.last_move = None
 
     def load_sounds(self):
         try:
+            pygame.mixer.init()
             self.click_sound = pygame.mixer.Sound(buffer=self.generate_beep(200, 0.1))
             self.win_sound = pygame.mixer.Sound(buffer=self.generate_beep(400, 0.4))
         except:
@@ -402,11 +1991,13 @@ class GomokuGUI:
         style.configure('Subtitle.TLabel', font=('Helvetica', 16), foreground=self.colors['accent'])
         style.configure('Result.TLabel', font=('Helvetica', 18, 'bold'), foreground=self.colors['win_highlight'])
         style.configure('TButton', font=('Helvetica', 12), padding=8)
+        style.configure('TCheckbutton', background=self.colors['light'], foreground=self.colors['dark'], font=('Helvetica', 12))
         style.configure('Game.TButton', font=('Helvetica', 12, 'bold'), background=self.colors['primary'], foreground=self.colors['text'], padding=10)
         style.map('Game.TButton', background=[('active', self.colors['accent']), ('!disabled', self.colors['primary'])], 
         foreground=[('active', self.colors['text']), ('!disabled', self.colors['text'])])
 
     def show_setup_page(self):
+        self.cancel_ai()
         self.clear_window()
         main_frame = ttk.Frame(self.root)
         main_frame.pack(fill=tk.BOTH,expand=True)
@@ -433,10 +2024,10 @@ class GomokuGUI:
         
         ttk.Label(form_frame, text="Type:").grid(row=3, column=0, sticky=tk.W, pady=7)
         self.p1_type = tk.StringVar(value="Human")
-        p1_type_menu = ttk.OptionMenu(form_frame, self.p1_type, "Minimax AI", "Human", "Minimax AI", "Alpha-Beta AI")
+        p1_type_menu = ttk.OptionMenu(form_frame, self.p1_type, "Minimax AI", *PLAYER_TYPES)
         p1_type_menu.grid(row=3, column=1, sticky=tk.W, pady=7)
         
-        ttk.Label(form_frame, text="AI Depth (if applicable):").grid(row=4, column=0, sticky=tk.W, pady=7)
+        ttk.Label(form_frame, text="AI Depth / MCTS seconds:").grid(row=4, column=0, sticky=tk.W, pady=7)
         self.p1_depth = tk.IntVar(value=2)
         p1_depth_entry = ttk.Entry(form_frame, textvariable=self.p1_depth, width=5, style='TEntry')
         p1_depth_entry.grid(row=4, column=1, sticky=tk.W, pady=7)
@@ -451,19 +2042,23 @@ class GomokuGUI:
         
         ttk.Label(form_frame, text="Type:").grid(row=7, column=0, sticky=tk.W, pady=7)
         self.p2_type = tk.StringVar(value="Human")
-        p2_type_menu = ttk.OptionMenu(form_frame, self.p2_type, "Alpha-Beta AI", "Human", "Minimax AI", "Alpha-Beta AI")
+        p2_type_menu = ttk.OptionMenu(form_frame, self.p2_type, "Alpha-Beta AI", *PLAYER_TYPES)
         p2_type_menu.grid(row=7, column=1, sticky=tk.W, pady=7)
         
-        ttk.Label(form_frame, text="AI Depth (if applicable):").grid(row=8, column=0, sticky=tk.W, pady=7)
+        ttk.Label(form_frame, text="AI Depth / MCTS seconds:").grid(row=8, column=0, sticky=tk.W, pady=7)
         self.p2_depth = tk.IntVar(value=2)
         p2_depth_entry = ttk.Entry(form_frame, textvariable=self.p2_depth, width=5, style='TEntry')
         p2_depth_entry.grid(row=8, column=1, sticky=tk.W, pady=7)
+
+        # Let an AI keep searching while a human thinks
+        self.ponder = tk.BooleanVar(value=True)
+        ttk.Checkbutton(form_frame, text="AI thinks on the human's turn", variable=self.ponder).grid(row=9, column=0, columnspan=2, sticky=tk.W, pady=(30,0))
         
         # Start button
         button_frame = ttk.Frame(main_frame)
         button_frame.pack()
         start_button = ttk.Button(button_frame, text="Start Game", style='Game.TButton', command=self.start_game)
-        start_button.pack(pady=(105,30))
+        start_button.pack(pady=(60,30))
         
         self.p1_type.trace_add('write', lambda *args: self.toggle_depth_field(p1_depth_entry, self.p1_type))
         self.p2_type.trace_add('write', lambda *args: self.toggle_depth_field(p2_depth_entry, self.p2_type))
@@ -480,11 +2075,12 @@ class GomokuGUI:
             field.grid()
     
     def start_game(self):
+        self.cancel_ai()
         size = self.board_size.get()
         if size < 5 or size > 19:
             raise ValueError("Board size must be between 5 and 19")
 
-        self.game = Gomoku(size)
+        self.game = BitboardGomoku(size)
         self.players = [
             self.create_player(1, self.p1_name.get(), self.p1_type.get(), self.p1_depth.get()),
             self.create_player(2, self.p2_name.get(), self.p2_type.get(), self.p2_depth.get())
@@ -495,13 +2091,14 @@ class GomokuGUI:
         self.show_game_board()
 
     def create_player(self, player_id, name, player_type, depth):
-        if player_type == "Human":
-            return HumanPlayer(player_id, name)
-        elif player_type == "Minimax AI":
-            return MinimaxAIPlayer(player_id, name, depth)
-        elif player_type == "Alpha-Beta AI":
-            return AlphaBetaAIPlayer(player_id, name, depth)
+        # The depth field gives MCTS its seconds per move.
+        time_limit = depth if player_type == "MCTS AI" else None
+        return create_player(player_id, name, player_type, depth, time_limit)
     
+    def strength_text(self, player_type, depth):
+        # The depth field is seconds per move for MCTS (see create_player).
+        return f"Time: {depth}s per move" if player_type == "MCTS AI" else f"Depth: {depth}"
+
     def show_game_board(self):
         self.clear_window()
         main_frame = ttk.Frame(self.root)
@@ -522,7 +2119,7 @@ class GomokuGUI:
         ttk.Label(p1_frame, text=f"{self.players[0].name} (White)", style='Subtitle.TLabel').pack()
         ttk.Label(p1_frame, text=f"Type: {self.p1_type.get()}").pack()
         if self.p1_type.get() != "Human":
-            ttk.Label(p1_frame, text=f"Depth: {self.p1_depth.get()}").pack()
+            ttk.Label(p1_frame, text=self.strength_text(self.p1_type.get(), self.p1_depth.get())).pack()
         
         # Player 2 info
         p2_frame = ttk.Frame(info_frame)
@@ -530,14 +2127,19 @@ class GomokuGUI:
         ttk.Label(p2_frame, text=f"{self.players[1].name} (Black)", style='Subtitle.TLabel').pack()
         ttk.Label(p2_frame, text=f"Type: {self.p2_type.get()}").pack()
         if self.p2_type.get() != "Human":
-            ttk.Label(p2_frame, text=f"Depth: {self.p2_depth.get()}").pack()
+            ttk.Label(p2_frame, text=self.strength_text(self.p2_type.get(), self.p2_depth.get())).pack()
         
         # Game board frame
         board_frame = ttk.Frame(main_frame)
         board_frame.pack(expand=True, fill=tk.BOTH, pady=10)
         
+        # Search statistics of the last AI move, updated live while it thinks
+        self.stats_label = ttk.Label(board_frame, text="", justify=tk.LEFT, anchor=tk.NW, width=30, font=('Courier', 10))
+        self.stats_label.pack(side=tk.RIGHT, fill=tk.Y, padx=(10, 0))
+        
         self.canvas = tk.Canvas(board_frame, bg=self.colors['board'], highlightthickness=0)
         self.canvas.pack(expand=True, fill=tk.BOTH)
+        self.canvas.bind("<Configure>", self.schedule_redraw)
         
         # Control buttons frame - centered
         button_frame = ttk.Frame(main_frame)
@@ -564,7 +2166,7 @@ class GomokuGUI:
             if isinstance(self.players[self.current_player], HumanPlayer):
                 self.canvas.bind("<Button-1>", self.handle_click)
             else:
-                self.root.after(100, self.ai_move)
+                self.ai_pending = self.root.after(100, self.ai_move)
     
     def update_status_display(self):
         for widget in self.status_frame.winfo_children():
@@ -578,6 +2180,9 @@ class GomokuGUI:
             turn_label.pack()
 
     def draw_board(self):
+        # Full redraw, for a new game or a new canvas size. Moves during the
+        # game only add their stone (place_stone), so the item ids are kept.
+        self.redraw_pending = None
         self.canvas.delete("all")
         size = self.game.size
         canvas_width = self.canvas.winfo_width()
@@ -587,6 +2192,7 @@ class GomokuGUI:
         
         x_offset = (canvas_width - size * cell_size) / 2
         y_offset = (canvas_height - size * cell_size) / 2
+        self.geometry = (cell_size, x_offset, y_offset)
         
         for i in range(size + 1):
             self.canvas.create_line(
@@ -600,25 +2206,6 @@ class GomokuGUI:
                 fill=self.colors['dark'], width=2
             )
         
-        for row in range(size):
-            for col in range(size):
-                if self.game.board[row][col] == 1: 
-                    self.draw_piece(col, row, "white", cell_size, x_offset, y_offset)
-                elif self.game.board[row][col] == 2: 
-                    self.draw_piece(col, row, "black", cell_size, x_offset, y_offset)
-        
-        if self.last_move:
-            last_row, last_col = self.last_move
-            x = x_offset + (last_col + 0.5) * cell_size
-            y = y_offset + (last_row + 0.5) * cell_size
-            radius = cell_size * 0.4
-            
-            self.canvas.create_oval(
-                x - radius - 3, y - radius - 3,
-                x + radius + 3, y + radius + 3,
-                outline=self.colors['last_move'], width=3
-            )
-        
         if size >= 13:
             star_points = [
                 (3, 3), (size//2, 3), (size-4, 3),
@@ -630,6 +2217,49 @@ class GomokuGUI:
                 x = x_offset + col * cell_size
                 y = y_offset + row * cell_size
                 self.canvas.create_oval(x-3, y-3, x+3, y+3, fill=self.colors['dark'], outline="")
+        
+        self.stone_items = {}
+        for row in range(size):
+            for col in range(size):
+                if self.game.board[row][col] == 1: 
+                    self.stone_items[(row, col)] = self.draw_piece(col, row, "white", cell_size, x_offset, y_offset)
+                elif self.game.board[row][col] == 2: 
+                    self.stone_items[(row, col)] = self.draw_piece(col, row, "black", cell_size, x_offset, y_offset)
+        
+        self.last_move_item = None
+        if self.last_move:
+            self.mark_last_move()
+        
+        if self.game.winner:
+            self.highlight_winning_pieces()
+
+    def place_stone(self, row, col):
+        # Draw the one new stone and move the last-move ring onto it.
+        cell_size, x_offset, y_offset = self.geometry
+        color = "white" if self.game.board[row][col] == 1 else "black"
+        self.stone_items[(row, col)] = self.draw_piece(col, row, color, cell_size, x_offset, y_offset)
+        self.mark_last_move()
+
+    def mark_last_move(self):
+        cell_size, x_offset, y_offset = self.geometry
+        last_row, last_col = self.last_move
+        x = x_offset + (last_col + 0.5) * cell_size
+        y = y_offset + (last_row + 0.5) * cell_size
+        radius = cell_size * 0.4
+        box = (x - radius - 3, y - radius - 3, x + radius + 3, y + radius + 3)
+        
+        if self.last_move_item is None:
+            self.last_move_item = self.canvas.create_oval(*box, outline=self.colors['last_move'], width=3)
+        else:
+            self.canvas.coords(self.last_move_item, *box)
+            self.canvas.tag_raise(self.last_move_item)
+
+    def schedule_redraw(self, event):
+        # <Configure> fires repeatedly while the window is dragged; redraw
+        # once it has been quiet for a moment.
+        if self.redraw_pending is not None:
+            self.root.after_cancel(self.redraw_pending)
+        self.redraw_pending = self.root.after(100, self.draw_board)
 
     def draw_piece(self, col, row, color, cell_size, x_offset, y_offset):
         x = x_offset + (col + 0.5) * cell_size
@@ -643,17 +2273,18 @@ class GomokuGUI:
             shadow_offset = 2
             shadow_color = "#333333"
         
-        self.canvas.create_oval(
+        shadow = self.canvas.create_oval(
             x - radius + shadow_offset, y - radius + shadow_offset,
             x + radius + shadow_offset, y + radius + shadow_offset,
             fill=shadow_color, outline=""
         )
         
-        self.canvas.create_oval(
+        stone = self.canvas.create_oval(
             x - radius, y - radius,
             x + radius, y + radius,
             fill=color, outline=self.colors['dark'], width=1
         )
+        return shadow, stone
     
     def handle_click(self, event):
         if not isinstance(self.players[self.current_player], HumanPlayer):
@@ -680,7 +2311,7 @@ class GomokuGUI:
         
         if self.game.make_move(row, col, player.player_id):
             self.last_move = (row, col)
-            self.draw_board()
+            self.place_stone(row, col)
             
             if self.game.check_win(player.player_id):
                 if self.win_sound:
@@ -695,21 +2326,24 @@ class GomokuGUI:
             self.update_status_display()
             
             if not self.game_over and not isinstance(self.players[self.current_player], HumanPlayer):
-                self.root.after(100, self.ai_move)
+                self.ai_pending = self.root.after(100, self.ai_move)
+            elif self.ponder.get() and not isinstance(player, HumanPlayer):
+                self.start_job(player, player.ponder)
     
     def show_result(self, message):
         self.game_over = True
         self.game_result = message
         self.update_status_display()
         
-        if "wins" in message:
+        if self.game.winner:
             self.highlight_winning_pieces()
         
         self.canvas.unbind("<Button-1>")
 
     def reset_game(self):
+        self.cancel_ai()
         size = self.board_size.get()
-        self.game = Gomoku(size)
+        self.game = BitboardGomoku(size)
         self.current_player = 0
         self.game_over = False
         self.game_result = ""
@@ -721,40 +2355,13 @@ class GomokuGUI:
         if isinstance(self.players[self.current_player], HumanPlayer):
             self.canvas.bind("<Button-1>", self.handle_click)
         else:
-            self.root.after(100, self.ai_move)
+            self.ai_pending = self.root.after(100, self.ai_move)
 
     def highlight_winning_pieces(self):
-        size = self.game.size
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        cell_size = min(canvas_width, canvas_height) / (size + 1)
-        x_offset = (canvas_width - size * cell_size) / 2
-        y_offset = (canvas_height - size * cell_size) / 2
-        
-        winning_player = 1 if "Player 1" in self.game_result or self.players[0].name in self.game_result else 2
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        
-        winning_sequence = []
-        for row in range(size):
-            for col in range(size):
-                if self.game.board[row][col] == winning_player:
-                    for dr, dc in directions:
-                        sequence = []
-                        for i in range(5):
-                            r, c = row + i*dr, col + i*dc
-                            if 0 <= r < size and 0 <= c < size and self.game.board[r][c] == winning_player:
-                                sequence.append((r, c))
-                            else:
-                                break
-                        if len(sequence) >= 5:
-                            winning_sequence = sequence[:5]
-                            break
-                    if winning_sequence:
-                        break
-                if winning_sequence:
-                    break
+        # The game keeps the five it found when the winning stone was placed.
+        cell_size, x_offset, y_offset = self.geometry
         
-        for row, col in winning_sequence:
+        for row, col in self.game.winning_line:
             x = x_offset + (col + 0.5) * cell_size
             y = y_offset + (row + 0.5) * cell_size
             radius = cell_size * 0.4
@@ -766,12 +2373,117 @@ class GomokuGUI:
             )
     
     def ai_move(self):
-        if not self.game_over:
-            player = self.players[self.current_player]
-            row, col = player.get_move(self.game)
-            self.make_move(row, col)
+        self.ai_pending = None
+        player = self.players[self.current_player]
+        if not self.game_over and not self.thinking and not isinstance(player, HumanPlayer):
+            self.start_job(player, player.get_move)
+            self.thinking = True
+            self.ai_pending = self.root.after(50, self.poll_ai)
+
+    def start_job(self, player, task):
+        # Stops whatever is still running (a ponder, usually) and runs
+        # task(copy of the game) in a new thread once that one has finished,
+        # so a player is never searched from two threads at once.
+        self.cancel_ai()
+        job = self.job
+        game = copy_game(self.game)
+        previous = self.thread
+
+        def work():
+            if previous is not None:
+                previous.join()
+            player.stopped = False
+            if job != self.job:
+                return
+            player.on_progress = lambda stats: self.results.put((job, None, stats))
+            try:
+                result = task(game)
+            except SearchTimeout:
+                result = None
+            except Exception as error:
+                result = error  # for poll_ai to report instead of waiting forever
+            self.results.put((job, result, player.stats))
+
+        self.thread = threading.Thread(target=work, daemon=True)
+        self.thread.start()
+
+    def poll_ai(self):
+        self.ai_pending = None
+        if not self.thinking:
+            return
+        while not self.results.empty():
+            job, move, stats = self.results.get()
+            if job != self.job:
+                continue
+            if isinstance(move, Exception):
+                self.thinking = False
+                self.show_ai_error(move)
+                return
+            if stats:
+                self.show_stats(stats)
+            if move:
+                self.thinking = False
+                self.make_move(*move)
+                return
+        self.ai_pending = self.root.after(50, self.poll_ai)
+
+    def show_ai_error(self, error):
+        # The AI failed instead of moving; the game waits for a reset.
+        name = self.players[self.current_player].name
+        ttk.Label(self.status_frame, text=f"{name} failed: {type(error).__name__}: {error}",
+                  style='Result.TLabel').pack()
+
+    def show_stats(self, stats):
+        seconds = stats.seconds if stats.move else time.perf_counter() - stats.start
+        lines = [stats.name, ""]
+        if stats.move:
+            lines.append(f"Move:      {stats.move[0]}, {stats.move[1]}")
+        if stats.source == "book":
+            lines.append("Opening book")
+        elif stats.source == "threat":
+            lines.append(f"Forced win ({stats.nodes} solver nodes)")
+        elif stats.source == "mcts":
+            lines.append(f"Playouts:  {stats.nodes} ({stats.reused} reused)")
+            if stats.score is not None:
+                lines.append(f"Win rate:  {stats.score:.1%}")
+        else:
+            lines.append(f"Depth:     {stats.depth}")
+            lines.append(f"Nodes:     {stats.nodes}")
+            lines.append(f"Nodes/s:   {stats.nodes / seconds:.0f}" if seconds else "Nodes/s:")
+            lines.append(f"Leaves:    {stats.evaluations}")
+            lines.append(f"Cutoffs:   {sum(stats.cutoffs)}")
+            if stats.first_cutoffs is not None:
+                lines.append(f"  1st move {stats.first_cutoffs:.0%}")
+            if stats.branching:
+                lines.append(f"EBF:       {stats.branching:.1f}")
+            if stats.tt_hit_rate is not None:
+                lines.append(f"TT hits:   {stats.tt_hit_rate:.1%}")
+            if stats.score is not None:
+                lines.append(f"Score:     {stats.score:g}")
+            lines.append("")
+            lines.append("Time per depth:")
+            lines.extend(f"  {depth:2}: {spent:6.2f}s {nodes:>8}" for depth, spent, nodes in stats.depths)
+        lines.append("")
+        lines.append(f"Time:      {seconds:.2f}s")
+        if stats.pv:
+            lines.append("PV: " + " ".join(f"{r},{c}" for r, c in stats.pv[:8]))
+        self.stats_label.config(text="\n".join(lines))
+
+    def cancel_ai(self):
+        # Also drops a scheduled ai_move or poll_ai, which would otherwise
+        # search or draw on a game (or a canvas) that is gone.
+        if self.ai_pending is not None:
+            self.root.after_cancel(self.ai_pending)
+            self.ai_pending = None
+        self.job += 1
+        self.thinking = False
+        for player in self.players:
+            player.stopped = True
     
     def clear_window(self):
+        if self.redraw_pending is not None:
+            self.root.after_cancel(self.redraw_pending)
+            self.redraw_pending = None
         for widget in self.root.winfo_children():
             widget.destroy()
 ##################################### main #####################################
@@ -0,0 +1,120 @@
+# Analyzes positions in bulk: reads JSON lines from files or stdin, searches
+# each position with the alpha-beta player over a process pool and writes one
+# JSON line per position, in input order, with the best move, score and
+# principal variation. Input is read only as fast as results go out, so
+# memory stays flat however long the input is.
+# Each input line holds either a game, {"moves": [[row, col], ...], "size": 15}
+# (tournament.py records work as they are), or a position,
+# {"board": ["..X..", ".O...", ...]} with X, O and . or 1, 2 and 0, plus
+# "to_move" when it does not follow from the stone count.
+# Usage: python analyze.py [games.jsonl ...] [--every-ply] [--depth 4 | --seconds 1.0]
+#            [--workers 4] [--out analysis.jsonl]
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from Gomoku import AlphaBetaAIPlayer, BitboardGomoku
+
+STONES = {".": 0, "X": 1, "O": 2, "0": 0, "1": 1, "2": 2}
+
+def read_lines(paths):
+    # Lines of every file in turn, "-" being stdin, with their line numbers.
+    number = 0
+    for path in paths:
+        with (open(path) if path != "-" else sys.stdin) as lines:
+            for text in lines:
+                number += 1
+                if text.strip():
+                    yield number, text
+
+def positions(lines, every_ply):
+    # (info, size, stones, to_move) for each position to analyze, stones being
+    # (row, col, player) in the order they were played. Lines that cannot be
+    # read come through as ({"line": ..., "error": ...}, None, None, None) so
+    # they keep their place in the output.
+    for number, text in lines:
+        info = {"line": number}
+        try:
+            record = json.loads(text)
+            if "game" in record:
+                info["game"] = record["game"]
+            if "moves" in record:
+                moves = [tuple(move) for move in record["moves"]]
+                stones = [(row, col, 1 if i % 2 == 0 else 2) for i, (row, col) in enumerate(moves)]
+                size = record.get("size", 15)
+                for ply in range(len(moves)) if every_ply else [record.get("ply", len(moves))]:
+                    yield (dict(info, ply=ply, played=list(moves[ply]) if ply < len(moves) else None),
+                           size, stones[:ply], 1 if ply % 2 == 0 else 2)
+            else:
+                board = [[STONES[cell] for cell in row] for row in record["board"]]
+                stones = [(row, col, player) for row, line in enumerate(board) for col, player in enumerate(line) if player]
+                black = sum(1 for stone in stones if stone[2] == 1)
+                to_move = record.get("to_move", 1 if black == len(stones) - black else 2)
+                yield dict(info, ply=len(stones)), len(board), stones, to_move
+        except (ValueError, KeyError, TypeError, IndexError) as error:
+            yield dict(info, error=f"{type(error).__name__}: {error}"), None, None, None
+
+def analyze(task):
+    (info, size, stones, to_move), depth, seconds, seed = task
+    if "error" in info:
+        return info
+    game = BitboardGomoku(size)
+    for row, col, player in stones:
+        if not game.make_move(row, col, player):
+            return dict(info, error=f"illegal move {row},{col}")
+    info["to_move"] = to_move
+    if game.winner or game.is_draw():
+        return dict(info, result=game.winner or "draw")
+    # A fresh player per position, so results do not depend on which worker
+    # searched what before.
+    player = AlphaBetaAIPlayer(to_move, "analyze", depth, time_limit=seconds, seed=seed)
+    # A search has nothing to go on with an empty board; the book does.
+    player.use_book = not stones
+    player.log = None
+    player.get_move(game)
+    stats = player.stats.as_dict()
+    for key in ("move", "score", "pv", "source", "nodes", "seconds"):
+        info[key] = stats[key]
+    info["depth"] = player.stats.depth
+    return info
+
+def ordered_map(pool, function, items, window):
+    # pool.map reads its whole input up front; this keeps at most window tasks
+    # in flight and yields results in input order.
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(function, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputs", nargs="*", default=["-"], help="JSON-lines files, - for stdin")
+    parser.add_argument("--every-ply", action="store_true", help="analyze every position of each game, not just the last")
+    parser.add_argument("--depth", type=int, default=4, help="search depth per position")
+    parser.add_argument("--seconds", type=float, help="search each position for this long instead of to --depth")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--window", type=int, help="positions in flight at once, 4 per worker by default")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="output file, stdout by default")
+    args = parser.parse_args()
+
+    tasks = ((position, args.depth, args.seconds, args.seed) for position in positions(read_lines(args.inputs), args.every_ply))
+    out = open(args.out, "w") if args.out else sys.stdout
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for result in ordered_map(pool, analyze, tasks, args.window or 4 * args.workers):
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Compares the list and bitboard board backends: the per-node game overhead
+# (make_move, check_win, is_draw, undo_move), candidate move generation, and
+# nodes a second of a fixed-depth alpha-beta search on suite.py's positions,
+# which checks that both backends play the same moves with the same nodes.
+# Usage: python benchmarks/backend_speed.py [--sizes 15 19] [--depth 3]
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from Gomoku import AlphaBetaAIPlayer, BitboardGomoku, Gomoku, prepare_search
+from suite import PHASES, per_call, position
+
+BACKENDS = {"list": Gomoku, "bitboard": BitboardGomoku}
+
+def node_rate(game, player):
+    # Every legal move made, checked and taken back, per second.
+    moves = game.get_legal_moves()
+
+    def nodes():
+        for row, col in moves:
+            game.make_move(row, col, player)
+            game.check_win(player)
+            game.is_draw()
+            game.undo_move(row, col)
+    return len(moves) / per_call(nodes) * 1e6
+
+def search(game, player_id, depth):
+    player = AlphaBetaAIPlayer(player_id, "bench", depth, seed=0, threat_budget=0)
+    player.use_book = False
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        move = player.get_move(game)
+    return move, player.nodes, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15, 19])
+    parser.add_argument("--depth", type=int, default=3)
+    args = parser.parse_args()
+    for size in args.sizes:
+        rates = {}
+        for name, backend in BACKENDS.items():
+            game, player = position(backend, size, "middle")
+            raw = node_rate(game, player)
+            prepare_search(game, 2)
+            candidates = per_call(game.get_candidate_moves)
+            moves, nodes, elapsed = [], 0, 0
+            for phase in PHASES:
+                game, player = position(backend, size, phase)
+                move, count, seconds = search(game, player, args.depth)
+                moves.append(move)
+                nodes += count
+                elapsed += seconds
+            rates[name] = nodes / elapsed
+            print(f"{size}x{size} {name:>8}: {raw:.0f} bare nodes/s, candidates {candidates:.1f} us, "
+                  f"depth {args.depth} {nodes} nodes at {rates[name]:.0f} nodes/s, moves {moves}")
+        print(f"{size}x{size} bitboard search speedup {rates['bitboard'] / rates['list']:.2f}x")
+
+if __name__ == "__main__":
+    main()
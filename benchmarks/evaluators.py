@@ -0,0 +1,85 @@
+# Compares the pattern evaluation with a neural.py model: leaf evaluations a
+# second (the pattern scores kept incrementally and batched through
+# evaluate_boards, the network one position at a time and in one batch of all
+# the children), then fixed-depth alpha-beta with each on the
+# selective_search.py positions: nodes a second, and whether the move played
+# on a tactical position is a sound one. For playing strength, run
+# the two against each other with tournament.py (see the README).
+# Usage: python benchmarks/evaluators.py models/cnn15.npz [--depth 2] [--size 15]
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from Gomoku import AlphaBetaAIPlayer, evaluator_class, prepare_search
+from selective_search import QUIET_SEEDS, SUITE, position, quiet_position
+
+def leaf_rate(game, evaluator, batched):
+    # Children of game scored per second, fresh each time (no cache hits).
+    prepare_search(game, 2, evaluator)
+    moves = game.get_candidate_moves()
+    rounds = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < 1 or not rounds:
+        if hasattr(game.evaluator, "cache"):
+            game.evaluator.cache.clear()
+        for row, col in moves:
+            game.make_move(row, col, 1)
+            if batched:
+                game.evaluator.stage()
+            else:
+                game.evaluate(2)
+            game.undo_move(row, col)
+        if batched:
+            game.evaluator.flush(2)
+        rounds += 1
+    return rounds * len(moves) / (time.perf_counter() - start), len(moves)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("model")
+    parser.add_argument("--depth", type=int, default=2)
+    args = parser.parse_args()
+    evaluators = {"patterns": None, "batch": "batch", "neural": args.model}
+    cases = [(name, position(black, white), to_move, sound) for name, black, white, to_move, sound in SUITE]
+    cases += [(f"quiet {seed}", *quiet_position(seed), None) for seed in QUIET_SEEDS]
+
+    game = cases[-1][1]
+    rate, count = leaf_rate(game, None, False)
+    print(f"leaves of a {count}-move node: patterns {rate:.0f}/s", end="")
+    rate, _ = leaf_rate(game, "batch", True)
+    print(f", patterns batched {rate:.0f}/s", end="")
+    rate, _ = leaf_rate(game, args.model, False)
+    print(f", neural one at a time {rate:.0f}/s", end="")
+    rate, _ = leaf_rate(game, args.model, True)
+    print(f", neural batched {rate:.0f}/s")
+    evaluator_class(args.model)  # load before the timings
+
+    print(f"alpha-beta to depth {args.depth} on {len(cases)} positions:")
+    moves = {}
+    for label, evaluator in evaluators.items():
+        nodes = 0
+        blunders = []
+        start = time.perf_counter()
+        for name, game, to_move, sound in cases:
+            # The threat solver would answer most of these before the search runs.
+            player = AlphaBetaAIPlayer(to_move, "bench", args.depth, seed=0, threat_budget=0, evaluator=evaluator)
+            player.use_book = False
+            with contextlib.redirect_stdout(io.StringIO()):
+                move = player.get_move(game)
+            moves.setdefault(name, []).append(move)
+            nodes += player.nodes
+            if sound is not None and move not in sound:
+                blunders.append(f"{name} {move}")
+        elapsed = time.perf_counter() - start
+        print(f"{label:>9}: {nodes} nodes, {elapsed:.1f}s, {nodes / elapsed:.0f} nodes/s, "
+              f"blunders {blunders or 'none'}")
+    same = sum(1 for played in moves.values() if len(set(played)) == 1)
+    print(f"same move with every evaluator on {same} of {len(cases)} positions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# Load-tests server.py: a number of simulated humans play games against the
+# AI at the same time for a while, each on its own connection, placing random
+# stones next to the ones already down. Reports moves per second, reply
+# latency percentiles and busy replies as seen by the clients, then the
+# server's own statistics. With --spawn it starts a server for the run.
+# Usage: python benchmarks/load_test.py [--clients 16] [--duration 30] [--spawn] [--workers 4]
+#            [--host 127.0.0.1] [--port 7878 | --unix PATH] [--depth 2] [--seconds 0.5] [--ai alphabeta]
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from server import percentiles
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, **request):
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+async def connect(args):
+    if args.unix:
+        return Client(*await asyncio.open_unix_connection(args.unix))
+    return Client(*await asyncio.open_connection(args.host, args.port))
+
+def human_move(size, taken, rng):
+    # A random empty cell touching a stone, or the centre on an empty board.
+    if not taken:
+        return size // 2, size // 2
+    near = [(r + dr, c + dc) for r, c in taken for dr in (-1, 0, 1) for dc in (-1, 0, 1)]
+    near = [(r, c) for r, c in near if 0 <= r < size and 0 <= c < size and (r, c) not in taken]
+    return rng.choice(near) if near else None
+
+async def play(args, number, deadline, results):
+    rng = random.Random(number)
+    client = await connect(args)
+    while time.perf_counter() < deadline:
+        reply = await client.request(op="new", size=args.size, ai=args.ai, depth=args.depth, seconds=args.seconds)
+        if not reply["ok"]:
+            results["busy" if reply.get("busy") else "errors"] += 1
+            await asyncio.sleep(0.1)
+            continue
+        game = reply["game"]
+        taken = set()
+        results["games"] += 1
+        while time.perf_counter() < deadline:
+            move = human_move(args.size, taken, rng)
+            if move is None:
+                break
+            start = time.perf_counter()
+            reply = await client.request(op="move", game=game, row=move[0], col=move[1])
+            if not reply["ok"]:
+                if not reply.get("busy"):
+                    results["errors"] += 1
+                    break
+                results["busy"] += 1
+                await asyncio.sleep(0.1)  # back off and retry the same move
+                continue
+            results["latency"].append(time.perf_counter() - start)
+            results["moves"] += 1
+            taken.add(move)
+            if reply["ai_move"]:
+                taken.add(tuple(reply["ai_move"]))
+            if reply["winner"] or reply["draw"]:
+                break
+        await client.request(op="close", game=game)
+    client.writer.close()
+
+async def run(args):
+    results = {"games": 0, "moves": 0, "busy": 0, "errors": 0, "latency": []}
+    start = time.perf_counter()
+    await asyncio.gather(*(play(args, number, start + args.duration, results) for number in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    print(f"{args.clients} clients, {elapsed:.1f}s: {results['games']} games, {results['moves']} moves "
+          f"({results['moves'] / elapsed:.1f}/s), {results['busy']} busy, {results['errors']} errors")
+    print("move latency:", json.dumps(percentiles(results["latency"])))
+    client = await connect(args)
+    print("server:", json.dumps(await client.request(op="stats"), indent=1))
+    client.writer.close()
+
+async def wait_for_server(args):
+    for _ in range(100):
+        try:
+            client = await connect(args)
+            client.writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise SystemExit("server did not come up")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7878)
+    parser.add_argument("--unix")
+    parser.add_argument("--size", type=int, default=15)
+    parser.add_argument("--ai", default="alphabeta")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--seconds", type=float, help="time per AI move instead of a fixed depth")
+    parser.add_argument("--spawn", action="store_true", help="start server.py for the run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="workers for the spawned server")
+    parser.add_argument("--queue", type=int, default=64, help="queue for the spawned server")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        command = [sys.executable, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server.py"),
+                   "--workers", str(args.workers), "--queue", str(args.queue)]
+        command += ["--unix", args.unix] if args.unix else ["--host", args.host, "--port", str(args.port)]
+        server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    try:
+        if server:
+            asyncio.run(wait_for_server(args))
+        asyncio.run(run(args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
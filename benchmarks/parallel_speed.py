@@ -0,0 +1,63 @@
+# Times AlphaBetaAIPlayer's root-parallel search at 1/2/4/8 workers on fixed
+# positions, the pool started beforehand, and checks that every worker count
+# picks the same move.
+# Usage: python benchmarks/parallel_speed.py [--size 15] [--depth 3] [--workers 1 2 4 8]
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from Gomoku import AlphaBetaAIPlayer, BitboardGomoku
+
+def position(size, stones, seed):
+    rng = random.Random(seed)
+    game = BitboardGomoku(size)
+    center = size // 2
+    player = 1
+    while stones:
+        row, col = center + rng.randint(-3, 3), center + rng.randint(-3, 3)
+        if game.make_move(row, col, player):
+            if game.winner:
+                game.undo_move(row, col)
+                continue
+            player = 3 - player
+            stones -= 1
+    return game, player
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=15)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--positions", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    print(f"{os.cpu_count()} CPUs, {args.size}x{args.size}, depth {args.depth}")
+
+    baseline = None
+    for workers in args.workers:
+        # One player, and so one pool, per worker count. Its first search, on
+        # a position of its own, starts the processes outside the timing. The
+        # book and the threat solver are off so that only the search is timed.
+        game, to_move = position(args.size, 12, -1)
+        player = AlphaBetaAIPlayer(to_move, "bench", args.depth, workers=workers, seed=0, threat_budget=0)
+        player.use_book = False
+        player.log = None
+        player.get_move(game)
+        moves = []
+        elapsed = nodes = 0
+        for seed in range(args.positions):
+            game, to_move = position(args.size, 12, seed)
+            player.player_id = to_move
+            start = time.perf_counter()
+            moves.append(player.get_move(game))
+            elapsed += time.perf_counter() - start
+            nodes += player.nodes
+        player.close()
+        baseline = baseline or elapsed
+        print(f"workers={workers}: {elapsed:.2f}s, {nodes} nodes, speedup {baseline / elapsed:.2f}x, moves {moves}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Compares the table-driven evaluate_line against the original string version
+# (kept here as the reference) on random mid-game boards, per line and per leaf.
+# Usage: python benchmarks/pattern_speed.py [size ...]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from Gomoku import BitboardGomoku, IncrementalEvaluator, evaluate_board, evaluate_line, get_lines, line_patterns
+
+def string_evaluate_line(line, player):
+    s = ''.join(str(cell) for cell in line)
+    score = 0
+    for pattern, value in line_patterns(player).items():
+        count = s.count(pattern)
+        if count:
+            score += count * value
+    return score
+
+def string_evaluate_board(board, player):
+    opponent = 2 if player == 1 else 1
+    score = 0
+    for line in get_lines(board):
+        score += string_evaluate_line(line, player)
+        score -= string_evaluate_line(line, opponent)
+    return score
+
+def random_game(size, stones, seed):
+    rng = random.Random(seed)
+    game = BitboardGomoku(size)
+    center = size // 2
+    player = 1
+    while stones:
+        row = min(max(center + round(rng.gauss(0, size / 6)), 0), size - 1)
+        col = min(max(center + round(rng.gauss(0, size / 6)), 0), size - 1)
+        if game.make_move(row, col, player):
+            if game.winner:
+                game.undo_move(row, col)
+                continue
+            player = 3 - player
+            stones -= 1
+    return game
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+def main(sizes):
+    for size in sizes:
+        games = [random_game(size, size * size // 4, seed) for seed in range(10)]
+        lines = [line for game in games for line in get_lines(game.board)]
+        for line in lines:
+            for player in (1, 2):
+                assert evaluate_line(line, player) == string_evaluate_line(line, player)
+
+        string_line = timed(lambda: [string_evaluate_line(line, 1) for line in lines], 5) / len(lines)
+        table_line = timed(lambda: [evaluate_line(line, 1) for line in lines], 5) / len(lines)
+
+        boards = [game.board for game in games]
+        string_leaf = timed(lambda: [string_evaluate_board(board, 1) for board in boards], 3) / len(boards)
+        table_leaf = timed(lambda: [evaluate_board(board, 1) for board in boards], 3) / len(boards)
+
+        # Incremental leaf: one move + score + undo, as the search does.
+        game = games[0]
+        game.evaluator = IncrementalEvaluator(game)
+        moves = game.get_legal_moves()
+
+        def leaves():
+            for row, col in moves:
+                game.make_move(row, col, 1)
+                game.evaluate(1)
+                game.undo_move(row, col)
+        incremental_leaf = timed(leaves, 5) / len(moves)
+
+        print(f"{size}x{size}: evaluate_line {string_line * 1e6:.1f} -> {table_line * 1e6:.1f} us "
+              f"({string_line / table_line:.1f}x); leaf {string_leaf * 1e6:.0f} -> {table_leaf * 1e6:.0f} us "
+              f"({string_leaf / table_leaf:.1f}x), incremental {incremental_leaf * 1e6:.1f} us "
+              f"({string_leaf / incremental_leaf:.0f}x)")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [9, 15, 19])
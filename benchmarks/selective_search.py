@@ -0,0 +1,102 @@
+# Runs AlphaBetaAIPlayer with each selective-search switch on a fixed suite of
+# tactical positions and a few quiet ones: depth reached in the time limit,
+# nodes, and whether the move played on a tactical position is a sound one.
+# Usage: python benchmarks/selective_search.py [--time 2] [--configs none lmr null futility all]
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from Gomoku import AlphaBetaAIPlayer, BitboardGomoku
+
+# (name, black stones, white stones, player to move, sound moves) on 15x15.
+SUITE = [
+    ("complete five",
+     [(7, 5), (7, 6), (7, 7), (7, 8)], [(6, 5), (8, 6), (6, 7), (8, 8)], 1, {(7, 4), (7, 9)}),
+    ("block four",
+     [(4, 4), (7, 9), (9, 6), (5, 9)], [(5, 5), (6, 6), (7, 7), (8, 8)], 1, {(9, 9)}),
+    ("win before blocking",
+     [(7, 3), (7, 4), (7, 5), (7, 6), (2, 10)], [(7, 2), (3, 10), (4, 10), (5, 10), (6, 10)], 1, {(7, 7)}),
+    ("block open three",
+     [(6, 6), (8, 9), (9, 5)], [(7, 6), (7, 7), (7, 8)], 1, {(7, 4), (7, 5), (7, 9), (7, 10)}),
+    ("block broken three",
+     [(5, 8), (9, 9), (3, 5)], [(5, 7), (6, 7), (8, 7)], 1, {(4, 7), (7, 7), (9, 7)}),
+    ("make open four",
+     [(7, 6), (7, 7), (7, 8)], [(6, 7), (8, 5), (9, 9)], 1, {(7, 5), (7, 9)}),
+    ("block four over own three",
+     [(4, 4), (10, 2), (10, 3), (10, 4)], [(5, 5), (6, 6), (7, 7), (8, 8)], 1, {(9, 9)}),
+    ("double three",
+     [(7, 7), (7, 8), (8, 6), (9, 6)], [(3, 3), (3, 11), (11, 11), (11, 3)], 1, {(7, 6)}),
+]
+
+# Seeds of quiet middle games, where the threat solver finds no forced win
+# for either side, for the depth figures.
+QUIET_SEEDS = (5, 6, 15, 17, 24, 28)
+
+CONFIGS = {
+    "none": {},
+    "lmr": {"use_lmr": True},
+    "null": {"use_null_move": True},
+    "futility": {"use_futility": True},
+    "all": {"use_lmr": True, "use_null_move": True, "use_futility": True},
+}
+
+def position(black, white):
+    game = BitboardGomoku(15)
+    for row, col in black:
+        game.make_move(row, col, 1)
+    for row, col in white:
+        game.make_move(row, col, 2)
+    return game
+
+def quiet_position(seed):
+    rng = random.Random(seed)
+    game = BitboardGomoku(15)
+    player = 1
+    stones = 10
+    while stones:
+        row, col = 7 + rng.randint(-3, 3), 7 + rng.randint(-3, 3)
+        if game.make_move(row, col, player):
+            if game.winner:
+                game.undo_move(row, col)
+                continue
+            player = 3 - player
+            stones -= 1
+    return game, player
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--time", type=float, default=2.0)
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=list(CONFIGS))
+    args = parser.parse_args()
+    print(f"{len(SUITE)} tactical and {len(QUIET_SEEDS)} quiet positions, {args.time}s per move")
+    cases = [(name, position(black, white), to_move, sound) for name, black, white, to_move, sound in SUITE]
+    cases += [(f"quiet {seed}", *quiet_position(seed), None) for seed in QUIET_SEEDS]
+
+    for config in args.configs:
+        depths = []
+        nodes = 0
+        blunders = []
+        start = time.perf_counter()
+        for name, game, to_move, sound in cases:
+            # The threat solver would answer most of these before the search runs.
+            player = AlphaBetaAIPlayer(to_move, "bench", time_limit=args.time, seed=0, threat_budget=0,
+                                       **CONFIGS[config])
+            player.use_book = False  # books reach 8 plies, past some of these positions
+            with contextlib.redirect_stdout(io.StringIO()):
+                move = player.get_move(game)
+            depths.append(player.completed_depth)
+            nodes += player.nodes
+            if sound is not None and move not in sound:
+                blunders.append(f"{name} {move}")
+        elapsed = time.perf_counter() - start
+        print(f"{config:>8}: depths {depths}, mean {sum(depths) / len(depths):.1f}, {nodes} nodes, "
+              f"{elapsed:.1f}s, blunders {blunders or 'none'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# Benchmarks the engine's hot paths on fixed positions at several board sizes
+# and game phases, and writes the results to JSON. With --compare it also
+# reports how each figure moved against a saved run and exits with status 1
+# if anything got slower than --threshold allows.
+# Usage: python benchmarks/suite.py [--out results.json] [--compare baseline.json]
+#            [--sizes 9 15 19] [--filter alphabeta] [--threshold 0.25]
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from Gomoku import (AlphaBetaAIPlayer, BitboardGomoku, Gomoku, MinimaxAIPlayer, evaluate_board, evaluate_line,
+                    get_lines)
+
+# Stones on the board in each phase, as a share of the cells.
+PHASES = {"opening": 0.03, "middle": 0.12, "late": 0.3}
+BACKENDS = {"list": Gomoku, "bitboard": BitboardGomoku}
+
+def position(backend, size, phase):
+    # Stones dropped around the centre from a seed fixed by size and phase,
+    # skipping any that would end the game.
+    rng = random.Random(f"{size}/{phase}")
+    game = backend(size)
+    spread = max(2, int(size * PHASES[phase] * 3))
+    center = size // 2
+    player = 1
+    stones = max(6, int(size * size * PHASES[phase]))
+    while stones:
+        row = min(max(center + rng.randint(-spread, spread), 0), size - 1)
+        col = min(max(center + rng.randint(-spread, spread), 0), size - 1)
+        if game.make_move(row, col, player):
+            if game.winner:
+                game.undo_move(row, col)
+                continue
+            player = 3 - player
+            stones -= 1
+    return game, player
+
+def per_call(function):
+    # Best of three timing runs, in microseconds per call.
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(3, number)) / number * 1e6
+
+def micro(size, phase):
+    results = {}
+    for name, backend in BACKENDS.items():
+        game, player = position(backend, size, phase)
+        results[f"check_win/{name}"] = per_call(lambda: game.check_win(player))
+        results[f"get_legal_moves/{name}"] = per_call(game.get_legal_moves)
+    game, player = position(BitboardGomoku, size, phase)
+    board = game.board
+    lines = get_lines(board)
+    # Averaged over every line of the board.
+    results["evaluate_line"] = per_call(lambda: [evaluate_line(line, player) for line in lines]) / len(lines)
+    results["get_lines"] = per_call(lambda: get_lines(board))
+    results["evaluate_board"] = per_call(lambda: evaluate_board(board, player))
+    return {f"micro/{key}/{size}/{phase}": {"us_per_call": round(value, 3)} for key, value in results.items()}
+
+def macro(size, phase, kind, depth):
+    # Best of three searches, each by a fresh player.
+    game, player_id = position(BitboardGomoku, size, phase)
+    elapsed = float("inf")
+    for _ in range(3):
+        if kind == "minimax":
+            player = MinimaxAIPlayer(player_id, "bench", depth, seed=0)
+        else:
+            player = AlphaBetaAIPlayer(player_id, "bench", depth, seed=0, threat_budget=0)
+        player.use_book = False  # books reach 8 plies; time the search, not a lookup
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            move = player.get_move(game)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return {f"macro/{kind}/{size}/{phase}/depth{depth}": {
+        "seconds": round(elapsed, 4), "nodes": player.nodes,
+        "nodes_per_sec": round(player.nodes / elapsed) if elapsed else 0, "move": list(move),
+    }}
+
+# Searches faster than this are too noisy to call regressions on.
+MIN_SECONDS = 0.01
+
+def compare(results, baseline, threshold):
+    # Times more than threshold slower count as regressions; node counts and
+    # chosen moves that changed are listed but do not fail the run.
+    regressions = 0
+    for key in sorted(results.keys() & baseline.keys()):
+        new, old = results[key], baseline[key]
+        for metric in ("us_per_call", "seconds"):
+            if metric in new and old.get(metric):
+                ratio = new[metric] / old[metric]
+                flag = ""
+                if ratio > 1 + threshold and (metric != "seconds" or old[metric] >= MIN_SECONDS):
+                    flag = "  REGRESSION"
+                    regressions += 1
+                elif ratio < 1 - threshold:
+                    flag = "  faster"
+                print(f"{key:<52} {metric:<12} {old[metric]:>12.3f} -> {new[metric]:>12.3f} ({ratio:.2f}x){flag}")
+        if "nodes" in new and new["nodes"] != old.get("nodes"):
+            print(f"{key:<52} nodes        {old.get('nodes')} -> {new['nodes']}")
+        if "move" in new and new["move"] != old.get("move"):
+            print(f"{key:<52} move changed {old.get('move')} -> {new['move']}")
+    missing = len(baseline.keys() - results.keys())
+    print(f"{regressions} regressions over {threshold:.0%}, {missing} baseline entries not run")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default="benchmark.json")
+    parser.add_argument("--compare", help="earlier --out file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="slowdown that counts as a regression")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[9, 15, 19])
+    parser.add_argument("--phases", nargs="+", default=list(PHASES), choices=list(PHASES))
+    parser.add_argument("--minimax-depths", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--alphabeta-depths", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--filter", default="", help="only run groups whose name (micro/SIZE/PHASE or macro/KIND/SIZE/PHASE/depthN) contains this")
+    args = parser.parse_args()
+
+    jobs = []
+    for size in args.sizes:
+        for phase in args.phases:
+            jobs.append((f"micro/{size}/{phase}", micro, (size, phase)))
+            for kind, depths in (("minimax", args.minimax_depths), ("alphabeta", args.alphabeta_depths)):
+                for depth in depths:
+                    jobs.append((f"macro/{kind}/{size}/{phase}/depth{depth}", macro, (size, phase, kind, depth)))
+
+    results = {}
+    for name, function, arguments in jobs:
+        if args.filter in name:
+            for key, value in function(*arguments).items():
+                results[key] = value
+                print(f"{key:<52} {json.dumps(value)}", flush=True)
+
+    with open(args.out, "w") as out:
+        json.dump({
+            "python": platform.python_version(), "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results,
+        }, out, indent=1)
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            if compare(results, json.load(baseline)["results"], args.threshold):
+                sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# Builds the opening book the search players read from books/SIZE.book. From
+# the empty board it searches every position reachable in --plies moves where
+# each side plays its best move or one of the --width - 1 next best, storing
+# the best move for each. Positions are keyed by their canonical hash, so the
+# 8 rotations and reflections of a position are searched once and share an
+# entry.
+# Usage: python build_book.py [--size 15] [--plies 6] [--width 2] [--depth 4] [--workers 4] [--out books/15.book]
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from Gomoku import (BOOK_DIR, AlphaBetaAIPlayer, BitboardGomoku, OpeningBook, canonical_hash, prepare_search,
+                    symmetries)
+
+def replay(size, moves):
+    game = BitboardGomoku(size)
+    for index, (row, col) in enumerate(moves):
+        game.make_move(row, col, 1 if index % 2 == 0 else 2)
+    return game
+
+def best_moves(task):
+    # The searched best move of the position, then the width - 1 next best,
+    # each found by searching the root again without the ones already taken.
+    size, moves, depth, width = task
+    game = replay(size, moves)
+    if not moves:
+        return [(size // 2, size // 2)]  # every first move is searched alike, and the centre is best
+    player_id = 1 if len(moves) % 2 == 0 else 2
+    player = AlphaBetaAIPlayer(player_id, "book", depth, seed=0)
+    player.use_book = False
+    player.log = None
+    found = [player.get_move(game)]
+    prepare_search(game, player.radius, player.evaluator)
+    # One move from each set leading to symmetric positions, so the
+    # alternatives are not mirror images of the best move.
+    children = {}
+    for row, col in [found[0]] + player.search_moves(game):
+        game.make_move(row, col, player_id)
+        children.setdefault(canonical_hash(game)[0], (row, col))
+        game.undo_move(row, col)
+    rest = [move for move in children.values() if move not in found]
+    while len(found) < width and rest:
+        player.begin_search(game, None)
+        scores = player.search_root(game, rest, depth)
+        move = max(scores, key=scores.get)
+        found.append(move)
+        rest.remove(move)
+    return found
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=15)
+    parser.add_argument("--plies", type=int, default=6, help="deepest position in the book, in stones on the board")
+    parser.add_argument("--width", type=int, default=2, help="moves followed from each position")
+    parser.add_argument("--depth", type=int, default=4, help="alpha-beta search depth")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out")
+    args = parser.parse_args()
+    out = args.out or os.path.join(BOOK_DIR, f"{args.size}.book")
+
+    forward, _ = symmetries(args.size)
+    entries = {}
+    frontier = [[]]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for ply in range(args.plies + 1):
+            tasks = [(args.size, moves, args.depth, args.width) for moves in frontier]
+            following = []
+            for moves, found in zip(frontier, pool.map(best_moves, tasks)):
+                game = replay(args.size, moves)
+                key, symmetry = canonical_hash(game)
+                row, col = found[0]
+                entries[key] = forward[symmetry][row * args.size + col]
+                if ply < args.plies:
+                    for row, col in found:
+                        game.make_move(row, col, 1 if ply % 2 == 0 else 2)
+                        if not game.winner:
+                            following.append(moves + [(row, col)])
+                        game.undo_move(row, col)
+            # Keep one of each set of symmetric positions.
+            frontier = []
+            seen = set()
+            for moves in following:
+                key, _ = canonical_hash(replay(args.size, moves))
+                if key not in seen and key not in entries:
+                    seen.add(key)
+                    frontier.append(moves)
+            print(f"ply {ply}: {len(entries)} positions, {time.perf_counter() - start:.1f}s", flush=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    OpeningBook.write(out, args.size, args.plies, entries)
+    print(f"wrote {len(entries)} positions to {out}")
+
+if __name__ == "__main__":
+    main()
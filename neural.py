@@ -0,0 +1,276 @@
+# A small convolutional value/policy network in plain NumPy, usable by the
+# search players in place of the pattern evaluation: pass the path of a saved
+# model as their evaluator. Trained on CPU from game records (records.py),
+# such as tournament.py --records self-play. The network is fully
+# convolutional, so one model plays on any board size.
+# Input planes for the side to move: own stones, opponent stones, and ones
+# (zero in the padding, which marks the edge). A stack of 3x3 ReLU
+# convolutions feeds a 1x1 convolution giving a logit per cell (the policy)
+# and a global average pool into two dense layers ending in tanh (the value).
+# Usage: python neural.py train selfplay.gmr [more.gmr ...] --out models/cnn.npz
+#            [--channels 32] [--layers 4] [--epochs 10] [--batch 256] [--lr 0.002]
+import argparse
+import time
+
+import numpy as np
+
+PLANES = 3
+VALUE_SCALE = 100000  # a value of 1 in search score units, an open four's worth
+CACHE_LIMIT = 200000  # positions an evaluator remembers before starting over
+BATCH = 32            # positions a forward pass takes at most; larger ones run slower on CPU
+
+def encode(boards, players):
+    # (B, H, W) boards of 0, 1 and 2 and the side to move in each, to
+    # (B, H, W, PLANES) float32 inputs.
+    own = boards == np.asarray(players).reshape(-1, 1, 1)
+    opponent = (boards != 0) & ~own
+    return np.stack([own, opponent, np.ones_like(own)], axis=-1).astype(np.float32)
+
+def patches(x):
+    # (B, H, W, C) to (B, H, W, 9 * C): each cell's 3x3 neighbourhood, zero off the board.
+    height, width = x.shape[1:3]
+    padded = np.pad(x, ((0, 0), (1, 1), (1, 1), (0, 0)))
+    return np.concatenate([padded[:, i:i + height, j:j + width] for i in range(3) for j in range(3)], axis=3)
+
+def unpatch(grad, channels):
+    # The gradient of patches(): each neighbourhood slot added back to its cell.
+    height, width = grad.shape[1:3]
+    padded = np.zeros((grad.shape[0], height + 2, width + 2, channels), dtype=grad.dtype)
+    for k in range(9):
+        i, j = divmod(k, 3)
+        padded[:, i:i + height, j:j + width] += grad[..., k * channels:(k + 1) * channels]
+    return padded[:, 1:-1, 1:-1]
+
+class ConvNet:
+    def __init__(self, channels = 32, layers = 4, hidden = 32, seed = 0):
+        rng = np.random.default_rng(seed)
+        he = lambda fan_in, shape: (rng.standard_normal(shape) * np.sqrt(2 / fan_in)).astype(np.float32)
+        self.channels = channels
+        self.layers = layers
+        self.hidden = hidden
+        self.params = {}
+        inputs = PLANES
+        for layer in range(layers):
+            self.params[f"conv{layer}.w"] = he(9 * inputs, (9 * inputs, channels))
+            self.params[f"conv{layer}.b"] = np.zeros(channels, dtype=np.float32)
+            inputs = channels
+        self.params["policy.w"] = he(channels, (channels, 1))
+        self.params["policy.b"] = np.zeros(1, dtype=np.float32)
+        self.params["value1.w"] = he(channels, (channels, hidden))
+        self.params["value1.b"] = np.zeros(hidden, dtype=np.float32)
+        self.params["value2.w"] = he(hidden, (hidden, 1))
+        self.params["value2.b"] = np.zeros(1, dtype=np.float32)
+        # The evaluator class for the search players, bound to this model.
+        self.evaluator = type("NeuralEvaluator", (NeuralEvaluator,), {"model": self})
+
+    def save(self, path):
+        np.savez(path, shape=np.array([self.channels, self.layers, self.hidden]), **self.params)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as saved:
+            channels, layers, hidden = (int(value) for value in saved["shape"])
+            model = cls(channels, layers, hidden)
+            for name in model.params:
+                model.params[name] = saved[name].astype(np.float32)
+        return model
+
+    def forward(self, x, keep = False):
+        # x from encode(). Returns values (B,) in (-1, 1) for the side to move,
+        # policy logits (B, H, W) and, with keep, what backward() needs.
+        p = self.params
+        cache = []
+        h = x
+        for layer in range(self.layers):
+            columns = patches(h)
+            z = columns @ p[f"conv{layer}.w"] + p[f"conv{layer}.b"]
+            h = np.maximum(z, 0)
+            if keep:
+                cache.append((columns, z))
+        logits = (h @ p["policy.w"] + p["policy.b"])[..., 0]
+        pooled = h.mean(axis=(1, 2))
+        hidden = pooled @ p["value1.w"] + p["value1.b"]
+        values = np.tanh(np.maximum(hidden, 0) @ p["value2.w"] + p["value2.b"])[:, 0]
+        if keep:
+            cache.append((h, pooled, hidden, values))
+        return values, logits, cache
+
+    def backward(self, cache, grad_values, grad_logits):
+        # Gradients of every parameter from those of the two outputs.
+        p = self.params
+        grads = {}
+        h, pooled, hidden, values = cache[-1]
+        grad_out = (grad_values * (1 - values * values))[:, None]
+        relu_hidden = np.maximum(hidden, 0)
+        grads["value2.w"] = relu_hidden.T @ grad_out
+        grads["value2.b"] = grad_out.sum(axis=0)
+        grad_hidden = (grad_out @ p["value2.w"].T) * (hidden > 0)
+        grads["value1.w"] = pooled.T @ grad_hidden
+        grads["value1.b"] = grad_hidden.sum(axis=0)
+        grad_pooled = grad_hidden @ p["value1.w"].T
+        cells = h.shape[1] * h.shape[2]
+        grads["policy.w"] = h.reshape(-1, self.channels).T @ grad_logits.reshape(-1, 1)
+        grads["policy.b"] = grad_logits.sum().reshape(1)
+        grad_h = grad_logits[..., None] * p["policy.w"][:, 0] + grad_pooled[:, None, None, :] / cells
+        for layer in reversed(range(self.layers)):
+            columns, z = cache[layer]
+            grad_z = grad_h * (z > 0)
+            grads[f"conv{layer}.w"] = columns.reshape(-1, columns.shape[-1]).T @ grad_z.reshape(-1, self.channels)
+            grads[f"conv{layer}.b"] = grad_z.sum(axis=(0, 1, 2))
+            if layer:
+                grad_h = unpatch(grad_z @ p[f"conv{layer}.w"].T, self.channels)
+        return grads
+
+    def loss(self, boards, players, moves, targets, weights):
+        # Policy cross-entropy over the empty cells against the move played,
+        # plus squared value error against targets where weights is 1.
+        # Returns both losses and the gradients.
+        count = len(boards)
+        values, logits, cache = self.forward(encode(boards, players), keep=True)
+        flat = np.where(boards.reshape(count, -1) == 0, logits.reshape(count, -1), -1e9)
+        flat = flat - flat.max(axis=1, keepdims=True)
+        probabilities = np.exp(flat)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        rows = np.arange(count)
+        policy_loss = -np.log(probabilities[rows, moves] + 1e-12).mean()
+        value_loss = (weights * (values - targets) ** 2).mean()
+        grad_logits = probabilities
+        grad_logits[rows, moves] -= 1
+        grad_logits = (grad_logits / count).reshape(logits.shape).astype(np.float32)
+        grad_values = (2 * weights * (values - targets) / count).astype(np.float32)
+        return policy_loss, value_loss, self.backward(cache, grad_values, grad_logits)
+
+class NeuralEvaluator:
+    # The game.evaluator interface of IncrementalEvaluator (update, score)
+    # backed by a ConvNet, the model class attribute set by ConvNet.evaluator.
+    # Being batched, the search also stages positions and scores them all in
+    # one forward pass, and asks it for policy logits to order moves by.
+    # Results are remembered by position hash and side to move. Keeps a list
+    # board like IncrementalEvaluator's for the threat scans, and an array.
+    model = None
+    batched = True
+
+    def __init__(self, game):
+        self.game = game
+        self.board = [row[:] for row in game.board]
+        self.cells = np.array(self.board, dtype=np.int8)
+        self.staged = []
+        self.cache = {}
+
+    def update(self, row, col, player):
+        self.board[row][col] = player
+        self.cells[row, col] = player
+
+    def evaluate(self, positions, player):
+        # (board, hash) pairs to (score, logits) for player to move in each.
+        results = [self.cache.get((key, player)) for _, key in positions]
+        missing = [index for index, result in enumerate(results) if result is None]
+        if len(self.cache) + len(missing) > CACHE_LIMIT:
+            self.cache.clear()
+        for first in range(0, len(missing), BATCH):
+            chunk = missing[first:first + BATCH]
+            boards = np.stack([positions[index][0] for index in chunk])
+            values, logits, _ = self.model.forward(encode(boards, player))
+            for index, value, cells in zip(chunk, values, logits):
+                results[index] = (int(value * VALUE_SCALE), cells.ravel())
+                self.cache[(positions[index][1], player)] = results[index]
+        return results
+
+    def score(self, player):
+        return self.evaluate([(self.cells, self.game.hash)], player)[0][0]
+
+    def policy(self, player):
+        # Logits per flat cell for player to move here.
+        return self.evaluate([(self.cells, self.game.hash)], player)[0][1]
+
+    def stage(self):
+        self.staged.append((self.cells.copy(), self.game.hash))
+
+    def flush(self, player):
+        # Scores of every staged position for player to move, in one pass.
+        staged, self.staged = self.staged, []
+        return [score for score, _ in self.evaluate(staged, player)] if staged else []
+
+def symmetry(boards, moves, k, flip):
+    # Rotate boards (B, S, S) by k quarter turns and optionally mirror them,
+    # with flat move indices following along.
+    size = boards.shape[1]
+    marks = np.zeros_like(boards, dtype=np.int8).reshape(len(boards), -1)
+    marks[np.arange(len(boards)), moves] = 1
+    marks = marks.reshape(boards.shape)
+    boards, marks = np.rot90(boards, k, axes=(1, 2)), np.rot90(marks, k, axes=(1, 2))
+    if flip:
+        boards, marks = boards[:, :, ::-1], marks[:, :, ::-1]
+    return np.ascontiguousarray(boards), marks.reshape(len(boards), size * size).argmax(axis=1)
+
+def training_data(paths):
+    # Positions before every move of every game, the side to move, the move
+    # played and the game's result for the side to move (weight 0 when the
+    # game was left unfinished).
+    from records import DRAW, FIRST_WON, SECOND_WON, RecordReader
+    boards, moves, results = [], [], []
+    for path in paths:
+        game_boards, game_moves, game_results = RecordReader(path).positions()
+        boards.append(game_boards)
+        moves.append(game_moves)
+        results.append(game_results)
+    boards, moves, results = np.concatenate(boards), np.concatenate(moves), np.concatenate(results)
+    players = np.where((boards != 0).sum(axis=(1, 2)) % 2 == 0, 1, 2)
+    first = np.select([results == FIRST_WON, results == SECOND_WON], [1.0, -1.0], 0.0)
+    targets = np.where(players == 1, first, -first).astype(np.float32)
+    weights = np.isin(results, (FIRST_WON, SECOND_WON, DRAW)).astype(np.float32)
+    return boards, players, moves, targets, weights
+
+def train(model, data, epochs, batch, lr, seed = 0, log = print):
+    # Adam over shuffled batches, each under a random board symmetry.
+    boards, players, moves, targets, weights = data
+    rng = np.random.default_rng(seed)
+    moments = {name: (np.zeros_like(value), np.zeros_like(value)) for name, value in model.params.items()}
+    beta1, beta2 = 0.9, 0.999
+    step = 0
+    for epoch in range(epochs):
+        start = time.perf_counter()
+        order = rng.permutation(len(boards))
+        totals = np.zeros(2)
+        for first in range(0, len(order), batch):
+            chosen = order[first:first + batch]
+            batch_boards, batch_moves = symmetry(boards[chosen], moves[chosen], rng.integers(4), rng.integers(2))
+            policy_loss, value_loss, grads = model.loss(batch_boards, players[chosen], batch_moves,
+                                                        targets[chosen], weights[chosen])
+            totals += (policy_loss * len(chosen), value_loss * len(chosen))
+            step += 1
+            for name, grad in grads.items():
+                m, v = moments[name]
+                m *= beta1
+                m += (1 - beta1) * grad
+                v *= beta2
+                v += (1 - beta2) * grad * grad
+                model.params[name] -= (lr * (m / (1 - beta1 ** step)) / (np.sqrt(v / (1 - beta2 ** step)) + 1e-8)).astype(np.float32)
+        policy_loss, value_loss = totals / len(order)
+        log(f"epoch {epoch + 1}: policy loss {policy_loss:.3f}, value loss {value_loss:.3f}, "
+            f"{time.perf_counter() - start:.1f}s")
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("train", help="train a model on game records")
+    command.add_argument("records", nargs="+")
+    command.add_argument("--out", required=True)
+    command.add_argument("--init", help="continue training this saved model")
+    command.add_argument("--channels", type=int, default=32)
+    command.add_argument("--layers", type=int, default=4)
+    command.add_argument("--epochs", type=int, default=10)
+    command.add_argument("--batch", type=int, default=256)
+    command.add_argument("--lr", type=float, default=0.002)
+    command.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    data = training_data(args.records)
+    print(f"{len(data[0])} positions")
+    model = ConvNet.load(args.init) if args.init else ConvNet(args.channels, args.layers, seed=args.seed)
+    train(model, data, args.epochs, args.batch, args.lr, args.seed)
+    model.save(args.out)
+    print(f"saved {args.out}")
+
+if __name__ == "__main__":
+    main()
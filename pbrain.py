@@ -0,0 +1,221 @@
+# Plays AlphaBetaAIPlayer as a Gomocup engine over the Piskvork protocol on
+# stdin and stdout, so it can be run from Piskvork or another manager against
+# other engines. Freestyle rules: five or more in a row wins.
+# The turn and match clocks from INFO set each move's time budget, and
+# max_memory caps the transposition table and the line score cache.
+# Usage: point the manager at `python pbrain.py` (or a wrapper that runs it).
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from Gomoku import AlphaBetaAIPlayer, BitboardGomoku, limit_line_cache
+
+ABOUT = 'name="Gomoku_AI", version="1.0"'
+
+class TimeManager:
+    # Splits the match clock over the moves still expected and keeps within
+    # the turn limit, leaving a margin for replying. The search stops at the
+    # hard limit; past the soft one it starts no new depth, since the next
+    # would most likely not finish anyway.
+    MARGIN = 0.1        # share of each budget held back, and at least
+    MIN_MARGIN = 0.05   # seconds, for the reply to reach the manager
+    FAST = 0.1          # seconds per move for timeout_turn 0, "as fast as possible"
+    GAME_MOVES = 50     # own moves a game is budgeted for
+    MIN_MOVES_LEFT = 15 # the match clock is never spent faster than this
+
+    def __init__(self):
+        self.timeout_turn = 30000  # milliseconds, the protocol's default
+        self.timeout_match = 0     # milliseconds, 0 for no limit
+        self.time_left = None      # milliseconds on the match clock
+
+    def budget(self, own_moves):
+        turn = self.timeout_turn / 1000 if self.timeout_turn else self.FAST
+        if self.timeout_match and self.time_left is not None:
+            moves_left = max(self.MIN_MOVES_LEFT, self.GAME_MOVES - own_moves)
+            turn = min(turn, self.time_left / 1000 / moves_left)
+        hard = max(0.01, turn - max(turn * self.MARGIN, self.MIN_MARGIN))
+        return hard / 2, hard
+
+    def spent(self, seconds):
+        # Managers send time_left before each turn; until they do, count
+        # down from our own measure.
+        if self.time_left is not None:
+            self.time_left = max(0, self.time_left - seconds * 1000)
+
+def resident_mb():
+    # Peak resident memory of this process so far, or None where unknown.
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10  # bytes there, KB on Linux
+
+class Brain:
+    # Memory the process needs besides the table and the line score cache.
+    # Measured with CPython 3.11 on Linux: 48 MB resident once the engine is
+    # imported, and 3 MB more over a game with a 1 MB table and no cache.
+    BASE_MEMORY_MB = 48   # where the process's own size cannot be read
+    SEARCH_MEMORY_MB = 3  # the search's other state: boards, candidates, killers
+    TT_MEMORY_MB = 64     # table size without a memory limit
+
+    def __init__(self, out = sys.stdout):
+        self.out = out
+        self.clock = TimeManager()
+        self.max_memory = 0
+        # Taken once, with the engine loaded and before any table exists.
+        self.base_memory_mb = resident_mb() or self.BASE_MEMORY_MB
+        self.game = None
+        self.moves = []  # (row, col) in the order played, for TAKEBACK
+        self.player = None
+
+    def send(self, text):
+        self.out.write(text + "\n")
+        self.out.flush()
+
+    def start(self, size):
+        self.game = BitboardGomoku(size)
+        self.moves = []
+        self.player = None  # made at the first move, once INFO has been read
+
+    def memory_shares(self):
+        # Table and line score cache sizes in MB from what max_memory leaves
+        # over the baseline: half for the table and a quarter for the cache,
+        # as both sizes are estimates.
+        if not self.max_memory:
+            return self.TT_MEMORY_MB, None
+        spare = self.max_memory / 2 ** 20 - self.base_memory_mb - self.SEARCH_MEMORY_MB
+        return min(self.TT_MEMORY_MB, max(spare / 2, 1)), max(spare / 4, 0)
+
+    def color(self):
+        # Colours follow the move order, first player 1.
+        return 1 if (self.game.size * self.game.size - self.game.empty_count) % 2 == 0 else 2
+
+    def move(self):
+        # Our turn: search, play the move and send it as x,y (column, row).
+        start = time.perf_counter()
+        me = self.color()
+        if self.player is None or self.player.player_id != me:
+            self.player = None  # free the old table before making the new one
+            table_mb, cache_mb = self.memory_shares()
+            limit_line_cache(cache_mb)
+            self.player = AlphaBetaAIPlayer(me, "pbrain", tt_memory_mb=table_mb)
+            self.player.log = None
+        soft, hard = self.clock.budget((self.game.size * self.game.size - self.game.empty_count) // 2)
+        player = self.player
+        player.time_limit = hard
+        player.threat_budget = int(min(10000, hard * 5000))  # the solver searches some 16k nodes a second
+        player.stopped = False
+
+        def progress(stats):
+            self.send(f"MESSAGE depth {stats.depth} score {stats.score} nodes {stats.nodes} "
+                      f"pv {' '.join(f'{c},{r}' for r, c in stats.pv)}")
+            if time.perf_counter() - start > soft:
+                player.stopped = True
+
+        player.on_progress = progress
+        try:
+            row, col = player.get_move(self.game)
+        finally:
+            # progress refers back to the player; without this the cycle keeps
+            # a replaced player's table alive until the garbage collector runs.
+            player.on_progress = None
+        self.game.make_move(row, col, me)
+        self.moves.append((row, col))
+        self.clock.spent(time.perf_counter() - start)
+        self.send(f"{col},{row}")
+
+    def place(self, text, color):
+        col, row = (int(value) for value in text.split(",")[:2])
+        if not self.game.make_move(row, col, color):
+            raise ValueError(f"invalid move {text}")
+        self.moves.append((row, col))
+
+    def command(self, line, lines):
+        # Handles one command; lines supplies the rows that follow BOARD.
+        word, _, rest = line.strip().partition(" ")
+        word = word.upper()
+        rest = rest.strip()
+        if word == "START":
+            size = int(rest)
+            if not 5 <= size <= 32:
+                self.send("ERROR unsupported board size")
+                return
+            self.start(size)
+            self.send("OK")
+        elif word == "RECTSTART":
+            self.send("ERROR only square boards are supported")
+        elif word == "INFO":
+            key, _, value = rest.partition(" ")
+            key = key.lower()
+            if key == "timeout_turn":
+                self.clock.timeout_turn = int(value)
+            elif key == "timeout_match":
+                self.clock.timeout_match = int(value)
+            elif key == "time_left":
+                self.clock.time_left = int(value)
+            elif key == "max_memory":
+                self.max_memory = int(value)
+                self.player = None
+            elif key == "rule" and int(value) & 1:
+                self.send("MESSAGE exact five is not supported, playing freestyle")
+        elif self.game is None and word in ("RESTART", "BEGIN", "TURN", "BOARD", "TAKEBACK"):
+            self.send("ERROR no START yet")
+        elif word == "RESTART":
+            self.start(self.game.size)
+            self.send("OK")
+        elif word == "BEGIN":
+            self.move()
+        elif word == "TURN":
+            self.place(rest, self.color())
+            self.move()
+        elif word == "BOARD":
+            # Rows x,y,field until DONE, field 1 ours and 2 the opponent's.
+            # With as many of ours down as theirs, we moved first.
+            stones = []
+            for row in lines:
+                row = row.strip()
+                if row.upper() == "DONE":
+                    break
+                x, y, field = (int(value) for value in row.split(","))
+                stones.append((x, y, field))
+            own = sum(1 for stone in stones if stone[2] == 1)
+            me = 1 if own == len(stones) - own else 2
+            self.game = BitboardGomoku(self.game.size)
+            self.moves = []
+            for x, y, field in stones:
+                self.place(f"{x},{y}", me if field == 1 else 3 - me)
+            self.move()
+        elif word == "TAKEBACK":
+            # The game's win, hash and evaluator state only unwinds in the
+            # order the moves were played, so only the last one can go.
+            col, row = (int(value) for value in rest.split(","))
+            if not self.moves or self.moves[-1] != (row, col):
+                self.send(f"ERROR {rest} is not the last move")
+                return
+            self.moves.pop()
+            self.game.undo_move(row, col)
+            self.send("OK")
+        elif word == "ABOUT":
+            self.send(ABOUT)
+        elif word == "END":
+            raise SystemExit
+        elif word:
+            self.send(f"UNKNOWN {word}")
+
+    def run(self, lines):
+        for line in lines:
+            try:
+                self.command(line, lines)
+            except (ValueError, TypeError) as error:
+                self.send(f"ERROR {error}")
+
+def main():
+    Brain().run(iter(sys.stdin.readline, ""))
+
+if __name__ == "__main__":
+    main()
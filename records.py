@@ -0,0 +1,226 @@
+# Compact binary game records: an append-only file of games, each an 8-byte
+# header (board size, result, move count, two player ids) followed by its
+# moves packed at ceil(log2(size * size)) bits each, so one byte or less a
+# move up to 16x16 and 9 bits on 19x19. A side file of 8-byte offsets gives
+# random access by game index, and player names are kept in a small JSON
+# side file. Readers memory-map both files.
+# Usage: python records.py convert games.jsonl games.gmr   (tournament.py output)
+#        python records.py info games.gmr
+import argparse
+import json
+import os
+
+import numpy as np
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from Gomoku import BitboardGomoku
+
+MAGIC = b"GMKR"
+FILE_HEADER = np.dtype([("magic", "S4"), ("version", "<u2"), ("reserved", "<u2")])
+GAME_HEADER = np.dtype([("size", "u1"), ("result", "u1"), ("moves", "<u2"), ("first", "<u2"), ("second", "<u2")])
+OFFSET = np.dtype("<u8")
+# Results, from the first player's side.
+UNFINISHED, FIRST_WON, SECOND_WON, DRAW = 0, 1, 2, 3
+
+def move_bits(size):
+    return max(1, (size * size - 1).bit_length())
+
+def pack_moves(moves, size):
+    # (row, col) pairs to packed bytes, most significant bit first.
+    bits = move_bits(size)
+    cells = np.array([row * size + col for row, col in moves], dtype=">u2")
+    if not len(cells):
+        return b""
+    unpacked = np.unpackbits(cells.view(np.uint8).reshape(-1, 2), axis=1)[:, 16 - bits:]
+    return np.packbits(unpacked).tobytes()
+
+def unpack_moves(data, count, size):
+    # Packed bytes back to flat cell indices, row * size + col.
+    bits = move_bits(size)
+    unpacked = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=count * bits).reshape(count, bits)
+    weights = 1 << np.arange(bits - 1, -1, -1, dtype=np.uint16)
+    return unpacked.astype(np.uint16) @ weights
+
+def index_path(path):
+    return path + ".idx"
+
+def players_path(path):
+    return path + ".players"
+
+class RecordWriter:
+    # Appends games to path, creating it when missing. The index is written
+    # after each game's bytes, so a reader never sees a half-written game.
+    def __init__(self, path):
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self.data = open(path, "ab")
+        self.index = open(index_path(path), "ab")
+        if not exists:
+            np.array([(MAGIC, 1, 0)], dtype=FILE_HEADER).tofile(self.data)
+        self.offset = self.data.tell()
+        self.names = []
+        if os.path.exists(players_path(path)):
+            with open(players_path(path)) as names:
+                self.names = json.load(names)
+        self.ids = {name: number for number, name in enumerate(self.names)}
+
+    def player(self, name):
+        # A player's id, adding the name to the side file the first time.
+        if name not in self.ids:
+            self.ids[name] = len(self.names)
+            self.names.append(name)
+            with open(players_path(self.path), "w") as names:
+                json.dump(self.names, names)
+        return self.ids[name]
+
+    def write(self, size, moves, result, first = "", second = ""):
+        if not 1 <= size <= 255 or len(moves) > 65535:
+            raise ValueError("board or game too large for the record format")
+        header = np.array([(size, result, len(moves), self.player(first), self.player(second))], dtype=GAME_HEADER)
+        self.data.write(header.tobytes() + pack_moves(moves, size))
+        self.data.flush()
+        self.index.write(np.array([self.offset], dtype=OFFSET).tobytes())
+        self.index.flush()
+        self.offset = self.data.tell()
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class RecordReader:
+    # Random access to the games of a record file through memory maps; only
+    # the pages a game sits on are read.
+    def __init__(self, path):
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        header = self.data[:FILE_HEADER.itemsize].view(FILE_HEADER)
+        if header["magic"][0] != MAGIC or header["version"][0] != 1:
+            raise ValueError(f"{path} is not a game record file")
+        size = os.path.getsize(index_path(path)) if os.path.exists(index_path(path)) else 0
+        self.offsets = np.memmap(index_path(path), dtype=OFFSET, mode="r") if size else np.zeros(0, dtype=OFFSET)
+        self.names = []
+        if os.path.exists(players_path(path)):
+            with open(players_path(path)) as names:
+                self.names = json.load(names)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def header(self, index):
+        offset = int(self.offsets[index])
+        return self.data[offset:offset + GAME_HEADER.itemsize].view(GAME_HEADER)[0]
+
+    def headers(self):
+        # The headers of all games at once, gathered with one fancy index.
+        offsets = np.asarray(self.offsets, dtype=np.intp)[:, None] + np.arange(GAME_HEADER.itemsize)
+        return self.data[offsets].view(GAME_HEADER).ravel()
+
+    def cells(self, index):
+        # The moves of a game as flat cell indices.
+        offset = int(self.offsets[index])
+        header = self.header(index)
+        size, count = int(header["size"]), int(header["moves"])
+        start = offset + GAME_HEADER.itemsize
+        data = self.data[start:start + (count * move_bits(size) + 7) // 8]
+        return unpack_moves(data, count, size)
+
+    def record(self, index):
+        header = self.header(index)
+        size = int(header["size"])
+        name = lambda number: self.names[number] if number < len(self.names) else str(number)
+        return {
+            "size": size, "result": int(header["result"]),
+            "first": name(int(header["first"])), "second": name(int(header["second"])),
+            "moves": [list(divmod(int(cell), size)) for cell in self.cells(index)],
+        }
+
+    def replay(self, index, backend = BitboardGomoku):
+        # The final position of a game, as a game object.
+        size = int(self.header(index)["size"])
+        game = backend(size)
+        for ply, cell in enumerate(self.cells(index)):
+            game.make_move(*divmod(int(cell), size), 1 if ply % 2 == 0 else 2)
+        return game
+
+    def boards(self, index):
+        # Every position of a game before each move, as an (moves, size, size)
+        # int8 array of 0, 1 and 2, and the moves played from them.
+        size = int(self.header(index)["size"])
+        cells = self.cells(index).astype(np.intp)
+        count = len(cells)
+        colors = np.where(np.arange(count) % 2 == 0, 1, 2).astype(np.int8)
+        boards = np.zeros((count, size * size), dtype=np.int8)
+        # Position k holds moves 0..k-1: column cells[j] is colors[j] from row j + 1 on.
+        boards[:, cells] = np.tril(np.ones((count, count), dtype=np.int8), -1) * colors
+        return boards.reshape(count, size, size), cells
+
+    def positions(self, indices = None):
+        # Training data over many games of one board size: positions before
+        # every move, the move played from each and the game's result.
+        indices = range(len(self)) if indices is None else indices
+        boards, moves, results = [], [], []
+        size = None
+        for index in indices:
+            header = self.header(index)
+            if size is None:
+                size = int(header["size"])
+            elif int(header["size"]) != size:
+                raise ValueError("games of different board sizes")
+            game_boards, cells = self.boards(index)
+            boards.append(game_boards)
+            moves.append(cells)
+            results.append(np.full(len(cells), int(header["result"]), dtype=np.uint8))
+        if not boards:
+            return np.zeros((0, 0, 0), dtype=np.int8), np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.uint8)
+        return np.concatenate(boards), np.concatenate(moves), np.concatenate(results)
+
+def result_code(winner, moves, size):
+    # winner: 1 or 2 for the player who won, 0 for none yet.
+    if winner:
+        return FIRST_WON if winner == 1 else SECOND_WON
+    return DRAW if len(moves) == size * size else UNFINISHED
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="append the games of a JSON-lines file to a record file")
+    convert.add_argument("source")
+    convert.add_argument("target")
+    info = commands.add_parser("info", help="summarize a record file")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        count = 0
+        with open(args.source) as lines, RecordWriter(args.target) as writer:
+            for line in lines:
+                if line.strip():
+                    record = json.loads(line)
+                    moves = [tuple(move) for move in record["moves"]]
+                    size = record.get("size", 15)
+                    # As tournament.py codes its records: a game stopped
+                    # short of a full board is unfinished, not a draw.
+                    winner = {1.0: 1, 0.0: 2}.get(record.get("result"), 0)
+                    result = result_code(winner, moves, size)
+                    writer.write(size, moves, result, record.get("first", ""), record.get("second", ""))
+                    count += 1
+        print(f"appended {count} games to {args.target} ({os.path.getsize(args.target)} bytes)")
+    else:
+        reader = RecordReader(args.path)
+        if not len(reader):
+            print("no games")
+            return
+        headers = reader.headers()
+        print(f"{len(reader)} games, {int(headers['moves'].sum())} moves, {os.path.getsize(args.path)} bytes")
+        for code, label in ((FIRST_WON, "first won"), (SECOND_WON, "second won"), (DRAW, "draws"), (UNFINISHED, "unfinished")):
+            print(f"  {label}: {int((headers['result'] == code).sum())}")
+        print(f"  sizes: {sorted(set(int(size) for size in headers['size']))}")
+        print(f"  players: {', '.join(reader.names)}")
+
+if __name__ == "__main__":
+    main()
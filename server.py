@@ -0,0 +1,283 @@
+# Serves many games against the AI at once over a local TCP or Unix socket.
+# Games live in memory; AI moves are searched in a process pool with at most
+# --workers searches running and --queue waiting, each stopped after its time
+# limit. Requests past that get a "busy" reply and can be retried.
+# Protocol: one JSON object per line each way. Requests:
+#   {"op": "new", "size": 15, "ai": "alphabeta", "depth": 2, "seconds": 1.0, "human": 1}
+#   {"op": "move", "game": ID, "row": 7, "col": 7}
+#   {"op": "state", "game": ID}
+#   {"op": "close", "game": ID}
+#   {"op": "stats"}
+# Every reply has "ok", and "error" when it is false; an "id" in a request is
+# echoed back. "seconds" has alpha-beta deepen for that long instead of
+# searching to "depth"; either way a search stops at --max-seconds.
+# Usage: python server.py [--host 127.0.0.1] [--port 7878 | --unix PATH] [--workers 4] [--queue 64]
+#            [--max-seconds 5] [--max-games 10000] [--idle 600]
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from Gomoku import BitboardGomoku, create_player
+
+TYPES = {"alphabeta": "Alpha-Beta AI", "mcts": "MCTS AI"}
+LATENCY_SAMPLES = 10000  # latest requests the percentiles are taken over
+
+class Busy(Exception):
+    pass
+
+def search(task):
+    # Runs in a pool process: replays the game and searches it, stopping the
+    # player from a timer when the time limit is up.
+    size, moves, player_id, ai_type, depth, seconds, limit, seed = task
+    game = BitboardGomoku(size)
+    for index, (row, col) in enumerate(moves):
+        game.make_move(row, col, 1 if index % 2 == 0 else 2)
+    player = create_player(player_id, "server", ai_type, depth, seconds, seed)
+    player.log = None
+    timer = threading.Timer(limit, lambda: setattr(player, "stopped", True))
+    timer.start()
+    try:
+        move = player.get_move(game)
+    finally:
+        timer.cancel()
+    stats = player.stats
+    return move, {"source": stats.source, "depth": stats.depth, "nodes": stats.nodes, "seconds": round(stats.seconds, 4)}
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+    return {"p50_ms": pick(0.5), "p90_ms": pick(0.9), "p99_ms": pick(0.99), "max_ms": round(ordered[-1] * 1000, 2)}
+
+class Session:
+    def __init__(self, size, ai_type, depth, seconds, human):
+        self.game = BitboardGomoku(size)
+        self.moves = []
+        self.ai_type = ai_type
+        self.depth = depth
+        self.seconds = seconds
+        self.human = human
+        self.lock = asyncio.Lock()  # one request at a time changes the game
+        self.touched = time.monotonic()
+
+    def to_move(self):
+        return 1 if len(self.moves) % 2 == 0 else 2
+
+    def over(self):
+        return bool(self.game.winner) or self.game.is_draw()
+
+    def play(self, row, col):
+        if not self.game.make_move(row, col, self.to_move()):
+            raise ValueError(f"illegal move {row},{col}")
+        self.moves.append((row, col))
+
+    def state(self):
+        return {"size": self.game.size, "moves": [list(move) for move in self.moves], "human": self.human,
+                "to_move": self.to_move(), "winner": self.game.winner, "draw": self.game.is_draw()}
+
+class EngineServer:
+    def __init__(self, workers, queue_limit, max_seconds, max_games, idle):
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.slots = asyncio.Semaphore(workers)  # searches handed to the pool
+        self.waiting = 0                         # searches queued for a slot
+        self.queue_limit = queue_limit
+        self.max_seconds = max_seconds
+        self.max_games = max_games
+        self.idle = idle
+        self.sessions = {}
+        self.next_id = 1
+        self.counts = Counter()
+        self.latency = {name: deque(maxlen=LATENCY_SAMPLES) for name in ("request", "queue", "search")}
+        self.started = time.monotonic()
+
+    async def handle(self, reader, writer):
+        # Requests on one connection are answered in order; a client that
+        # stops reading stalls only its own connection.
+        try:
+            while line := await reader.readline():
+                start = time.perf_counter()
+                request = {}
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("expected a JSON object")
+                    reply = await self.dispatch(request)
+                    reply["ok"] = True
+                except Busy as error:
+                    reply = {"ok": False, "error": str(error), "busy": True}
+                    self.counts["busy"] += 1
+                except (ValueError, KeyError, TypeError) as error:
+                    reply = {"ok": False, "error": f"{type(error).__name__}: {error}"}
+                    self.counts["errors"] += 1
+                except Exception as error:
+                    # The server's fault rather than the request's (a broken
+                    # pool, say): logged, and answered like any other error.
+                    print(f"request {request!r} failed:", file=sys.stderr, flush=True)
+                    traceback.print_exc()
+                    reply = {"ok": False, "error": f"internal error: {type(error).__name__}: {error}"}
+                    self.counts["errors"] += 1
+                if isinstance(request, dict) and "id" in request:
+                    reply["id"] = request["id"]
+                self.latency["request"].append(time.perf_counter() - start)
+                self.counts["requests"] += 1
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, request):
+        op = request.get("op")
+        if op == "stats":
+            return self.stats()
+        if op == "new":
+            return await self.new_game(request)
+        if op not in ("move", "state", "close"):
+            raise ValueError(f"unknown op {op!r}")
+        session = self.sessions.get(request.get("game"))
+        if session is None:
+            raise KeyError(f"no game {request.get('game')}")
+        session.touched = time.monotonic()
+        if op == "state":
+            return dict(session.state(), game=request["game"])
+        if op == "close":
+            del self.sessions[request["game"]]
+            return {"game": request["game"]}
+        return await self.move(request["game"], session, int(request["row"]), int(request["col"]))
+
+    async def new_game(self, request):
+        if len(self.sessions) >= self.max_games:
+            raise Busy("too many games")
+        ai = request.get("ai", "alphabeta")
+        if ai not in TYPES:
+            raise ValueError(f"ai must be one of {', '.join(TYPES)}")
+        size = int(request.get("size", 15))
+        if not 5 <= size <= 19:
+            raise ValueError("size must be 5 to 19")
+        human = int(request.get("human", 1))
+        if human not in (1, 2):
+            raise ValueError("human must be 1 or 2")
+        seconds = request.get("seconds")
+        session = Session(size, TYPES[ai], int(request.get("depth", 2)), float(seconds) if seconds else None, human)
+        game_id = self.next_id
+        self.next_id += 1
+        self.sessions[game_id] = session
+        self.counts["games"] += 1
+        reply = {"game": game_id, "ai_move": None}
+        if human == 2:
+            try:
+                async with session.lock:
+                    reply.update(await self.ai_turn(game_id, session))
+            except BaseException:
+                del self.sessions[game_id]
+                raise
+        return reply
+
+    async def move(self, game_id, session, row, col):
+        async with session.lock:
+            if session.over():
+                raise ValueError("game over")
+            if session.to_move() != session.human:
+                raise ValueError("not your turn")
+            # Refuse before changing the game, so a busy reply leaves it as it was.
+            if self.waiting >= self.queue_limit:
+                raise Busy("search queue full")
+            session.play(row, col)
+            self.counts["moves"] += 1
+            reply = {"game": game_id, "ai_move": None}
+            if not session.over():
+                try:
+                    reply.update(await self.ai_turn(game_id, session))
+                except BaseException:
+                    session.game.undo_move(*session.moves.pop())
+                    raise
+            reply["winner"] = session.game.winner
+            reply["draw"] = session.game.is_draw()
+            return reply
+
+    async def ai_turn(self, game_id, session):
+        if self.waiting >= self.queue_limit:
+            raise Busy("search queue full")
+        queued = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            started = time.perf_counter()
+            self.latency["queue"].append(started - queued)
+            limit = min(session.seconds or self.max_seconds, self.max_seconds)
+            task = (session.game.size, session.moves, session.to_move(), session.ai_type, session.depth,
+                    session.seconds and limit, limit, game_id * 1000 + len(session.moves))
+            move, stats = await asyncio.get_running_loop().run_in_executor(self.pool, search, task)
+            self.latency["search"].append(time.perf_counter() - started)
+        finally:
+            self.slots.release()
+        session.play(*move)
+        self.counts["searches"] += 1
+        return {"ai_move": list(move), "search": stats}
+
+    def stats(self):
+        uptime = time.monotonic() - self.started
+        return {
+            "uptime": round(uptime, 1), "games": len(self.sessions), "waiting": self.waiting,
+            "counts": dict(self.counts), "searches_per_sec": round(self.counts["searches"] / uptime, 2) if uptime else 0,
+            "latency": {name: percentiles(samples) for name, samples in self.latency.items()},
+        }
+
+    async def expire(self):
+        # Drops games nobody has touched for idle seconds.
+        while True:
+            await asyncio.sleep(min(self.idle, 60))
+            cutoff = time.monotonic() - self.idle
+            for game_id in [key for key, session in self.sessions.items() if session.touched < cutoff]:
+                del self.sessions[game_id]
+                self.counts["expired"] += 1
+
+async def serve(args):
+    engine = EngineServer(args.workers, args.queue, args.max_seconds, args.max_games, args.idle)
+    if args.unix:
+        server = await asyncio.start_unix_server(engine.handle, path=args.unix)
+    else:
+        server = await asyncio.start_server(engine.handle, args.host, args.port)
+    expiry = asyncio.create_task(engine.expire())
+    # Stop on SIGTERM as on Ctrl-C, so the pool processes are shut down too.
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    print(f"serving on {args.unix or f'{args.host}:{args.port}'} with {args.workers} workers", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        expiry.cancel()
+        engine.pool.shutdown(cancel_futures=True)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7878)
+    parser.add_argument("--unix", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--queue", type=int, default=64, help="searches that may wait for a worker before requests are refused")
+    parser.add_argument("--max-seconds", type=float, default=5.0, help="longest a search may run")
+    parser.add_argument("--max-games", type=int, default=10000)
+    parser.add_argument("--idle", type=float, default=600, help="seconds before an untouched game is dropped")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# Plays AI-vs-AI matches without the GUI, spread over a process pool. Each
+# finished game is appended to a JSON-lines file; at the end every pairing and
+# every player gets a score, an Elo difference and a 95% confidence interval.
+# Players are NAME:TYPE[:DEPTH[:SECONDS[:MODEL]]] with TYPE one of minimax,
+# alphabeta or mcts, built the way the setup page builds them; MODEL is a
+# saved neural.py model the search players evaluate with instead of the
+# patterns. With --stats every record also carries each move's search
+# statistics, and with --records the games are also appended to a compact
+# binary record file (see records.py). --opening-moves starts each pair of
+# games (one with each colour) from the same random stones near the centre,
+# so that deterministic players do not repeat one game over and over.
+# Usage: python tournament.py --player ab2:alphabeta:2 --player mc:mcts::0.5
+#            [--mode roundrobin|gauntlet] [--games 10] [--size 15] [--workers 4] [--out games.jsonl] [--stats]
+#            [--records games.gmr] [--opening-moves 4]
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from Gomoku import BitboardGomoku, create_player
+from records import RecordWriter, result_code
+
+TYPES = {"minimax": "Minimax AI", "alphabeta": "Alpha-Beta AI", "mcts": "MCTS AI"}
+
+def parse_player(text):
+    parts = text.split(":")
+    if len(parts) < 2 or parts[1] not in TYPES:
+        raise argparse.ArgumentTypeError(f"expected NAME:{'|'.join(TYPES)}[:DEPTH[:SECONDS[:MODEL]]], got {text!r}")
+    depth = int(parts[2]) if len(parts) > 2 and parts[2] else 2
+    seconds = float(parts[3]) if len(parts) > 3 and parts[3] else None
+    model = ":".join(parts[4:]) or None
+    return {"name": parts[0], "type": TYPES[parts[1]], "depth": depth, "time_limit": seconds, "evaluator": model}
+
+def random_opening(size, count, rng):
+    # count distinct cells at most two from the centre, in play order.
+    centre = size // 2
+    cells = [(r, c) for r in range(centre - 2, centre + 3) for c in range(centre - 2, centre + 3)
+             if 0 <= r < size and 0 <= c < size]
+    return [list(cell) for cell in rng.sample(cells, min(count, len(cells)))]
+
+def play_game(task):
+    index, first, second, size, seed, with_stats, opening = task
+    players = [
+        create_player(1, first["name"], first["type"], first["depth"], first["time_limit"], seed, first["evaluator"]),
+        create_player(2, second["name"], second["type"], second["depth"], second["time_limit"], seed + 1,
+                      second["evaluator"]),
+    ]
+    for player in players:
+        player.log = None
+    game = BitboardGomoku(size)
+    moves = []
+    for row, col in opening:
+        game.make_move(row, col, 1 if len(moves) % 2 == 0 else 2)
+        moves.append([row, col])
+    stats = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        while not game.winner and not game.is_draw():
+            player = players[len(moves) % 2]
+            row, col = player.get_move(game)
+            if not game.make_move(row, col, player.player_id):
+                raise RuntimeError(f"{player.name} played an illegal move {row},{col}")
+            moves.append([row, col])
+            if with_stats and player.stats:
+                stats.append(player.stats.as_dict())
+    winner = players[game.winner - 1].name if game.winner else None
+    record = {
+        "game": index, "size": size, "seed": seed, "first": first["name"], "second": second["name"],
+        "winner": winner, "result": 1.0 if game.winner == 1 else 0.0 if game.winner else 0.5,
+        "plies": len(moves), "seconds": round(time.perf_counter() - start, 3), "moves": moves,
+        "code": result_code(game.winner, moves, size),
+    }
+    if with_stats:
+        record["stats"] = stats
+    return record
+
+def elo(score):
+    # Unbounded at scores of 0 and 1.
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+def rating(results):
+    # results: one score (1, 0.5 or 0) per game. Elo difference from the
+    # mean score, with a 95% Wilson interval on the score so that short or
+    # one-sided matches still get a sensible range. A mean score of 0 or 1
+    # is clamped half a game in so the estimate stays finite; the interval
+    # is not, so a sweep reads as a lower bound only (and a whitewash as an
+    # upper one).
+    n = len(results)
+    mean = sum(results) / n
+    z = 1.96
+    centre = (mean + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(mean * (1 - mean) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    clamp = lambda s: min(max(s, 0.5 / n), 1 - 0.5 / n)
+    # Rounded so that a bound of exactly 0 or 1 is not off by float error.
+    return mean, elo(clamp(mean)), elo(round(centre - half, 12)), elo(round(centre + half, 12))
+
+def signed(value):
+    # Whole Elo points with the sign; anything that rounds to 0 reads +0.
+    return f"{round(value):+d}" if math.isfinite(value) else f"{value:+}"
+
+def report(label, results):
+    wins = results.count(1.0)
+    draws = results.count(0.5)
+    mean, diff, low, high = rating(results)
+    print(f"{label:<32} +{wins} ={draws} -{len(results) - wins - draws}  score {mean:.1%}  "
+          f"Elo {signed(diff)} [{signed(low)}, {signed(high)}]")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--player", type=parse_player, action="append", required=True)
+    parser.add_argument("--mode", choices=["roundrobin", "gauntlet"], default="roundrobin",
+                        help="gauntlet plays the first player against each of the others")
+    parser.add_argument("--games", type=int, default=10, help="games per pairing, colours alternating")
+    parser.add_argument("--size", type=int, default=15)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="tournament.jsonl")
+    parser.add_argument("--records", help="also append the games to this binary record file")
+    parser.add_argument("--stats", action="store_true", help="store every move's search statistics in the records")
+    parser.add_argument("--opening-moves", type=int, default=0, help="random stones each pair of games starts from")
+    args = parser.parse_args()
+    players = args.player
+    if len({player["name"] for player in players}) != len(players):
+        parser.error("player names must be unique")
+    if len(players) < 2:
+        parser.error("need at least two players")
+
+    if args.mode == "gauntlet":
+        pairings = [(players[0], other) for other in players[1:]]
+    else:
+        pairings = [(a, b) for i, a in enumerate(players) for b in players[i + 1:]]
+    tasks = []
+    for a, b in pairings:
+        for game in range(args.games):
+            first, second = (a, b) if game % 2 == 0 else (b, a)
+            if game % 2 == 0:
+                opening = random_opening(args.size, args.opening_moves, random.Random(args.seed * 100003 + len(tasks)))
+            tasks.append((len(tasks), first, second, args.size, args.seed + 2 * len(tasks), args.stats, opening))
+
+    # scores[(a, b)]: a's result in each game between a and b.
+    scores = {}
+    records = RecordWriter(args.records) if args.records else None
+    with open(args.out, "w") as out, ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for future in as_completed([pool.submit(play_game, task) for task in tasks]):
+            record = future.result()
+            code = record.pop("code")
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            if records:
+                records.write(args.size, record["moves"], code, record["first"], record["second"])
+            first, second = record["first"], record["second"]
+            scores.setdefault((first, second), []).append(record["result"])
+            scores.setdefault((second, first), []).append(1 - record["result"])
+            print(f"game {record['game']}: {first} vs {second}: "
+                  f"{record['winner'] or 'draw'} in {record['plies']} plies, {record['seconds']:.1f}s")
+    if records:
+        records.close()
+
+    print()
+    for a, b in pairings:
+        report(f"{a['name']} vs {b['name']}", scores[(a["name"], b["name"])])
+    print()
+    for player in players:
+        results = [x for (a, _), games in scores.items() if a == player["name"] for x in games]
+        report(f"{player['name']} vs field", results)
+
+if __name__ == "__main__":
+    main()